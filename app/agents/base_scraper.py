@@ -1,34 +1,141 @@
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from app.models import Paper
-from typing import List, Dict, Any
+from app.repositories import CheckpointRepository, PaperRepository
+from app.config import settings
+from typing import List, Dict, Any, Optional, AsyncIterator
+import asyncio
+import httpx
+from app.agents.rate_limit import get_limiter, backoff_delay, parse_retry_after
+from app.agents import parse_pool, xml_backend
 
 class BaseScraper:
     """Base class for all paper scrapers"""
     
+    source: Optional[str] = None  # Key for persisted checkpoints
+    checkpoint: Optional[Dict[str, Any]] = None  # High-water mark reached by the last fetch
+    
     def save_papers(self, db: Session, papers_data: List[Dict[str, Any]]) -> int:
-        """Save papers to database, skip duplicates"""
-        saved_count = 0
-        for paper_data in papers_data:
+        """Save papers to database, skip duplicates; returns the number saved"""
+        rows = [{
+            "arxiv_id": paper_data["id"],
+            "title": paper_data["title"],
+            "authors": paper_data["authors"],
+            "abstract": paper_data["abstract"],
+            "published_date": paper_data["published"],
+            "pdf_url": paper_data["pdf_url"],
+        } for paper_data in papers_data]
+        return PaperRepository(db).insert_new(rows, source=self.source)
+    
+    def get_checkpoint(self, db: Session, query: Optional[str] = None):
+        """Load the stored high-water mark for this source and query"""
+        return CheckpointRepository(db).get(self.source, query or "")
+    
+    def save_checkpoint(self, db: Session, query: Optional[str] = None):
+        """Persist the high-water mark reached by the last fetch"""
+        if self.source and self.checkpoint:
+            CheckpointRepository(db).save(self.source, query or "", **self.checkpoint)
+    
+    async def _request(self, client, url: str, params: Optional[dict] = None, stream_parser=None,
+                       payload_parser=None, retries: int = 3, timeout=httpx.USE_CLIENT_DEFAULT):
+        """GET url under the host's adaptive rate limit, retrying with backoff
+        
+        Every outcome is fed back to the limiter. Retries wait for the
+        server's Retry-After when given, otherwise a jittered exponential
+        backoff. With stream_parser, the body is fed to it as it arrives and
+        the list of parsed papers is returned instead of the response. If
+        PARSE_WORKERS is set and a payload_parser (a module-level function
+        taking the body bytes) is given, the body is read whole and parsed
+        in the parse pool instead.
+        """
+        limiter = get_limiter(url)
+        loop = asyncio.get_running_loop()
+        for attempt in range(retries + 1):
+            retry_after = None
+            async with limiter.slot():
+                started = loop.time()
+                try:
+                    if stream_parser is None:
+                        response = await client.get(url, params=params, timeout=timeout)
+                    else:
+                        response = await client.send(
+                            client.build_request("GET", url, params=params, timeout=timeout), stream=True)
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    limiter.record(response.status_code, loop.time() - started, retry_after)
+                    if stream_parser is None:
+                        response.raise_for_status()
+                        return response
+                    try:
+                        response.raise_for_status()
+                        if payload_parser is not None and parse_pool.enabled():
+                            return await parse_pool.offload(payload_parser, await response.aread())
+                        return [paper async for paper in stream_parser(response.aiter_bytes())]
+                    finally:
+                        await response.aclose()
+                except (httpx.TimeoutException, httpx.TransportError):
+                    limiter.record(None, loop.time() - started)
+                    if attempt == retries:
+                        raise
+                except (httpx.HTTPError, *xml_backend.ParseError):
+                    if attempt == retries:
+                        raise
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+    
+    async def iter_papers(self, max_results: int, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """Yield papers as they are fetched - must be implemented by subclasses"""
+        raise NotImplementedError("Subclasses must implement iter_papers()")
+        yield
+    
+    async def fetch_recent_papers(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """Fetch recent papers into a list (takes the same arguments as iter_papers)"""
+        return [paper async for paper in self.iter_papers(*args, **kwargs)]
+    
+    async def ingest(self, db: Session, *args, batch_size: Optional[int] = None, **kwargs) -> Dict[str, int]:
+        """Fetch and save papers concurrently
+        
+        Papers from iter_papers() flow through a bounded queue into a saver
+        that writes them in batches on a worker thread, so each batch is
+        persisted while the next page is being fetched. Papers fetched before
+        a failure are still saved; the error is re-raised afterwards. If the
+        ingest is cancelled (e.g. timed out), the batch being written is
+        allowed to finish first.
+        """
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        counts = {"fetched": 0, "saved": 0}
+        error = None
+        
+        async def produce():
+            nonlocal error
+            try:
+                async for paper in self.iter_papers(*args, **kwargs):
+                    await queue.put(paper)
+            except Exception as e:
+                error = e
+            await queue.put(None)
+        
+        async def flush(batch):
+            counts["fetched"] += len(batch)
+            save = asyncio.ensure_future(asyncio.to_thread(self.save_papers, db, batch))
             try:
-                existing = db.query(Paper).filter(Paper.arxiv_id == paper_data["id"]).first()
-                if not existing:
-                    paper = Paper(
-                        arxiv_id=paper_data["id"],
-                        title=paper_data["title"],
-                        authors=paper_data["authors"],
-                        abstract=paper_data["abstract"],
-                        published_date=paper_data["published"],
-                        pdf_url=paper_data["pdf_url"]
-                    )
-                    db.add(paper)
-                    db.commit()
-                    saved_count += 1
-            except IntegrityError:
-                db.rollback()
-                continue
-        return saved_count
-    
-    async def fetch_recent_papers(self, max_results: int, **kwargs) -> List[Dict[str, Any]]:
-        """Fetch recent papers - must be implemented by subclasses"""
-        raise NotImplementedError("Subclasses must implement fetch_recent_papers()")
+                counts["saved"] += await asyncio.shield(save)
+            except asyncio.CancelledError:
+                # The worker thread can't be interrupted; let it finish with
+                # the session before the caller closes it
+                await asyncio.wait([save])
+                raise
+        
+        producer = asyncio.create_task(produce())
+        try:
+            batch = []
+            while (paper := await queue.get()) is not None:
+                batch.append(paper)
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    batch = []
+            if batch:
+                await flush(batch)
+        finally:
+            producer.cancel()
+        
+        if error:
+            raise error
+        return counts
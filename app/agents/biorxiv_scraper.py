@@ -1,51 +1,72 @@
-import httpx
 import asyncio
 from datetime import datetime, timedelta
 from app.agents.base_scraper import BaseScraper
+from app.http_client import borrow
+from app.config import settings
 
 class BiorxivScraper(BaseScraper):
+    source = "biorxiv"
+
     def __init__(self):
-        self.base_url = "https://api.biorxiv.org/details/biorxiv"
+        self.base_url = settings.BIORXIV_API_BASE
 
-    async def fetch_recent_papers(self, max_results=10, days_back=7, query=None):
-        """Fetch recent papers from bioRxiv API.
+    async def iter_papers(self, max_results=10, days_back=7, query=None,
+                          window_days=None, concurrency=None, checkpoint=None):
+        """Yield recent papers from bioRxiv API as pages arrive.
 
         If query is provided, pages through results and filters client-side,
         since the bioRxiv API does not support keyword search natively.
+
+        If window_days is set (default: BIORXIV_WINDOW_DAYS, 0 = serial), the
+        date range is split into windows of that many days which are fetched
+        concurrently, at most `concurrency` at a time and within the host's
+        adaptive rate limit. Windows are merged in date order and deduplicated
+        by DOI, so the result is the same as the serial walk.
+
+        If a checkpoint is given, the walk starts from its date and cursor
+        instead of `days_back` days ago. Once exhausted, the point reached is
+        left in self.checkpoint for the caller to persist.
         """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
-        start_str = start_date.strftime('%Y-%m-%d')
-        end_str = end_date.strftime('%Y-%m-%d')
+        start_cursor = 0
+        if checkpoint and checkpoint.last_date and checkpoint.last_date.date() >= start_date.date():
+            start_date = checkpoint.last_date
+            start_cursor = checkpoint.cursor or 0
+        start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.checkpoint = None
 
         keywords = [kw.lower() for kw in query.split()] if query else None
 
+        if window_days is None:
+            window_days = settings.BIORXIV_WINDOW_DAYS
+        if window_days and window_days > 0:
+            async for paper in self._iter_windowed(start_date, end_date, start_cursor, max_results, keywords,
+                                                   window_days, concurrency or settings.BIORXIV_CONCURRENCY):
+                yield paper
+            return
+
+        start_str = start_date.strftime('%Y-%m-%d')
+        end_str = end_date.strftime('%Y-%m-%d')
+
         seen_dois = set()
-        results = []
-        cursor = 0
+        count = 0
+        cursor = start_cursor
+        last_doi = None
+        stopped_at = None
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            while len(results) < max_results:
+        async with borrow(self.base_url) as client:
+            while stopped_at is None and count < max_results:
                 url = f"{self.base_url}/{start_str}/{end_str}/{cursor}/json"
-
-                for attempt in range(3):
-                    try:
-                        response = await client.get(url)
-                        response.raise_for_status()
-                        break
-                    except Exception as e:
-                        if attempt == 2:
-                            raise
-                        await asyncio.sleep(1)
-
-                data = response.json()
+                data = await self._get_page(client, url)
                 collection = data.get("collection", [])
 
                 if not collection:
                     break
 
-                for entry in collection:
+                for i, entry in enumerate(collection):
                     doi = entry.get("doi", "")
+                    last_doi = doi
                     if doi in seen_dois:
                         continue
                     seen_dois.add(doi)
@@ -53,19 +74,128 @@ class BiorxivScraper(BaseScraper):
                     paper = self._parse_entry(entry)
 
                     if keywords is None or self._matches_query(paper, keywords):
-                        results.append(paper)
-                        if len(results) >= max_results:
+                        yield paper
+                        count += 1
+                        if count >= max_results:
+                            stopped_at = cursor + i + 1
                             break
 
                 cursor += len(collection)
-                await asyncio.sleep(0.5)  # Rate limiting
+                if stopped_at is not None:
+                    break
 
                 msgs = data.get("messages", [{}])
                 total = int(msgs[0].get("total", 0)) if msgs else 0
                 if cursor >= total:
                     break
 
-        return results
+        self.checkpoint = self._next_checkpoint(start_date, end_date, stopped_at, last_doi)
+
+    def _next_checkpoint(self, window_start, end_date, stopped_at, last_doi):
+        """Resume inside the unfinished window, or from the end date once drained."""
+        if stopped_at is not None:
+            return {"last_date": window_start, "cursor": stopped_at, "last_id": last_doi}
+        return {
+            "last_date": end_date.replace(hour=0, minute=0, second=0, microsecond=0),
+            "cursor": 0,
+            "last_id": last_doi,
+        }
+
+    async def _get_page(self, client, url):
+        """GET one page of the details endpoint under the host's rate limit."""
+        response = await self._request(client, url)
+        return response.json()
+
+    async def _iter_windowed(self, start_date, end_date, start_cursor, max_results, keywords,
+                             window_days, concurrency):
+        """Fetch the date range as concurrent windows and yield them merged in order."""
+        windows = []
+        window_start = start_date
+        while window_start.date() <= end_date.date():
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+            windows.append((window_start, window_end))
+            window_start = window_end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        cursors = [start_cursor] + [0] * (len(windows) - 1)
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async with borrow(self.base_url) as client:
+            async def fetch(window, cursor):
+                async with semaphore:
+                    return await self._fetch_window(client, window, cursor, max_results, keywords)
+
+            tasks = [asyncio.create_task(fetch(w, c)) for w, c in zip(windows, cursors)]
+            try:
+                # Merge in date order while later windows are still in flight.
+                # A window stops early once it alone holds max_results matches;
+                # if cross-window duplicates leave the merge short, keep paging
+                # that window from where it stopped.
+                seen_dois = set()
+                count = 0
+                last_doi = None
+                for window, consumed, task in zip(windows, cursors, tasks):
+                    entries, next_cursor = await task
+                    while True:
+                        for entry in entries:
+                            consumed += 1
+                            doi = entry.get("doi", "")
+                            last_doi = doi
+                            if doi in seen_dois:
+                                continue
+                            seen_dois.add(doi)
+
+                            paper = self._parse_entry(entry)
+                            if keywords is None or self._matches_query(paper, keywords):
+                                yield paper
+                                count += 1
+                                if count >= max_results:
+                                    self.checkpoint = self._next_checkpoint(window[0], end_date, consumed, last_doi)
+                                    return
+
+                        if next_cursor is None:
+                            break
+                        entries, next_cursor = await self._fetch_window(
+                            client, window, next_cursor, max_results - count, keywords)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        self.checkpoint = self._next_checkpoint(start_date, end_date, None, last_doi)
+
+    async def _fetch_window(self, client, window, cursor, max_results, keywords):
+        """Page through one date window.
+
+        Returns the raw entries in API order and the cursor to resume from,
+        or None once the window is exhausted.
+        """
+        start_str, end_str = (d.strftime('%Y-%m-%d') for d in window)
+        entries = []
+        seen_dois = set()
+        matched = 0
+
+        while True:
+            url = f"{self.base_url}/{start_str}/{end_str}/{cursor}/json"
+            data = await self._get_page(client, url)
+            collection = data.get("collection", [])
+            if not collection:
+                return entries, None
+
+            for entry in collection:
+                entries.append(entry)
+                doi = entry.get("doi", "")
+                if doi in seen_dois:
+                    continue
+                seen_dois.add(doi)
+                if keywords is None or self._matches_query(self._parse_entry(entry), keywords):
+                    matched += 1
+
+            cursor += len(collection)
+            msgs = data.get("messages", [{}])
+            total = int(msgs[0].get("total", 0)) if msgs else 0
+            if cursor >= total:
+                return entries, None
+            if matched >= max_results:
+                return entries, cursor
 
     def _parse_entry(self, entry):
         title = entry.get("title", "").strip()
@@ -0,0 +1,61 @@
+"""Worker pool for parsing fetched payloads off the event loop
+
+With PARSE_WORKERS > 0, scrapers read each response body in full and hand
+it to a module-level parse function running in this pool, so parsing one
+batch overlaps with the network I/O of the others instead of stalling the
+loop. PARSE_EXECUTOR picks the pool:
+
+    process  separate interpreters, true parallelism for the pure-Python
+             ElementTree parsers (the default)
+    thread   cheaper hand-off, only useful for parsers that release the GIL
+
+The parse functions are the same ones used inline, so results are
+identical either way.
+"""
+import asyncio
+import atexit
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+
+
+def enabled() -> bool:
+    return settings.PARSE_WORKERS > 0
+
+
+def get_executor() -> Executor:
+    """Return the shared parse pool, starting it on first use"""
+    global _executor
+    if _executor is None:
+        if settings.PARSE_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=settings.PARSE_WORKERS, thread_name_prefix="parse")
+        else:
+            # spawn: forking a process that already runs scheduler and
+            # HTTP threads can deadlock the children
+            _executor = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"Parsing in a {settings.PARSE_EXECUTOR} pool of {settings.PARSE_WORKERS} workers")
+    return _executor
+
+
+async def offload(func, payload):
+    """Run func(payload) in the parse pool; func must be a module-level function"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, payload)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+atexit.register(shutdown)
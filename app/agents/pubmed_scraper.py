@@ -1,109 +1,191 @@
-import httpx
 import asyncio
-import xml.etree.ElementTree as ET
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta
 from app.agents.base_scraper import BaseScraper
+from app.http_client import borrow
+from app.agents.xml_stream import iter_elements
+from app.agents import xml_backend
+from app.agents.xml_backend import find, findall
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 class PubmedScraper(BaseScraper):
+    source = "pubmed"
+    
     def __init__(self):
-        self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+        self.base_url = settings.PUBMED_API_BASE
+        self.failed_batches = []
     
-    async def fetch_recent_papers(self, max_results=10, query="cancer OR diabetes"):
-        """Fetch recent papers from PubMed with batching"""
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Step 1: Search for paper IDs
-            search_url = f"{self.base_url}/esearch.fcgi"
-            search_params = {
-                "db": "pubmed",
-                "term": query,
-                "retmax": max_results,
-                "sort": "pub_date",
-                "retmode": "json"
-            }
-            
-            search_response = await client.get(search_url, params=search_params)
-            search_response.raise_for_status()
-            await asyncio.sleep(0.34)
-            
-            ids = search_response.json()["esearchresult"]["idlist"]
-            if not ids:
-                return []
+    async def iter_papers(self, max_results=10, query="cancer OR diabetes", checkpoint=None):
+        """Yield recent papers from PubMed through the E-utilities history server
+        
+        esearch stores the result set on the history server (usehistory=y) and
+        efetch pages through it by WebEnv/query_key, so the ID list never has
+        to come back to us. efetch batches run concurrently under the NCBI
+        rate budget (3 req/s, 10 req/s with NCBI_API_KEY), backing off
+        further on 429s, and failed batches are retried.
+        
+        If a checkpoint is given, only records whose Entrez date (EDAT) is on
+        or after its date are searched. When that delta is larger than
+        max_results, the EDAT window is halved until it fits (a single day is
+        fetched whole, however large), and the mark moves to the day after
+        the last one fetched, so the next run continues from there. Once
+        exhausted, the point reached is left in self.checkpoint for the
+        caller to persist.
+        """
+        run_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.checkpoint = None
+        self.failed_batches = []
+        
+        async with borrow(self.base_url) as client:
+            # Step 1: Search, leaving the result set on the history server
+            window_start = checkpoint.last_date if checkpoint and checkpoint.last_date else None
+            window_end = run_date
+            result = await self._search(client, query, window_start, window_end)
+            count = int(result.get("count", 0))
+            while window_start and count > max_results and window_end > window_start:
+                window_end = window_start + timedelta(days=(window_end - window_start).days // 2)
+                result = await self._search(client, query, window_start, window_end)
+                count = int(result.get("count", 0))
+            # A first run takes the newest max_results as its baseline; later runs fetch the whole window
+            total = count if window_start else min(count, max_results)
             
-            # Step 2: Fetch paper details in batches
-            batch_size = 100  # Smaller batches for reliability
-            all_papers = []
+            # Step 2: Page through the stored result set concurrently
+            batch_size = settings.PUBMED_BATCH_SIZE
+            semaphore = asyncio.Semaphore(settings.PUBMED_CONCURRENCY)
             
-            for i in range(0, len(ids), batch_size):
-                batch_ids = ids[i:i + batch_size]
-                
-                fetch_url = f"{self.base_url}/efetch.fcgi"
+            async def fetch_batch(retstart):
                 fetch_params = {
                     "db": "pubmed",
-                    "id": ",".join(batch_ids),
-                    "retmode": "xml"
+                    "WebEnv": result["webenv"],
+                    "query_key": result["querykey"],
+                    "retstart": retstart,
+                    "retmax": min(batch_size, total - retstart),
+                    "retmode": "xml",
                 }
-                
-                try:
-                    fetch_response = await client.get(fetch_url, params=fetch_params, timeout=60.0)
-                    fetch_response.raise_for_status()
-                    papers = self.parse_pubmed_response(fetch_response.text)
-                    all_papers.extend(papers)
-                except Exception as e:
-                    print(f"Warning: Batch {i//batch_size + 1} failed: {e}")
-                    continue
-                
-                await asyncio.sleep(0.34)
+                async with semaphore:
+                    try:
+                        return await self._eutils(client, "efetch.fcgi", fetch_params,
+                                                  stream_parser=self.iter_parse_pubmed,
+                                                  payload_parser=parse_pubmed_payload)
+                    except Exception as e:
+                        logger.warning(f"PubMed batch at retstart={retstart} failed after retries: {e}")
+                        self.failed_batches.append(retstart)
+                        return []
             
-            return all_papers
+            tasks = [asyncio.create_task(fetch_batch(i)) for i in range(0, total, batch_size)]
+            try:
+                # Yield batches in result order while later ones are in flight
+                for task in tasks:
+                    for paper in await task:
+                        yield paper
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        # Only move the high-water mark when the whole window was fetched. Today
+        # can still gain records, so it is searched again; a past day is complete.
+        if not self.failed_batches:
+            next_date = window_end if window_end == run_date else window_end + timedelta(days=1)
+            self.checkpoint = {"last_date": next_date, "cursor": 0}
+    
+    async def _search(self, client, query, mindate=None, maxdate=None):
+        """esearch with usehistory=y; returns the esearchresult (count, webenv, querykey)"""
+        params = {
+            "db": "pubmed",
+            "term": query,
+            "retmax": 0,
+            "sort": "pub_date",
+            "retmode": "json",
+            "usehistory": "y",
+        }
+        if mindate:
+            params.update({
+                "datetype": "edat",
+                "mindate": mindate.strftime("%Y/%m/%d"),
+                "maxdate": maxdate.strftime("%Y/%m/%d"),
+            })
+        response = await self._eutils(client, "esearch.fcgi", params)
+        return response.json()["esearchresult"]
+    
+    async def _eutils(self, client, endpoint, params, stream_parser=None, payload_parser=None):
+        """GET an E-utilities endpoint under the NCBI rate budget, retrying with backoff"""
+        if settings.NCBI_API_KEY:
+            params = {**params, "api_key": settings.NCBI_API_KEY}
+        return await self._request(client, f"{self.base_url}/{endpoint}", params, stream_parser=stream_parser,
+                                   payload_parser=payload_parser, retries=settings.PUBMED_MAX_RETRIES, timeout=60.0)
     
     def parse_pubmed_response(self, xml_text):
         """Parse PubMed XML response"""
-        root = ET.fromstring(xml_text)
+        root = xml_backend.fromstring(xml_text)
         papers = []
         
-        for article in root.findall(".//PubmedArticle"):
-            try:
-                pmid = article.find(".//PMID").text
-                
-                title_elem = article.find(".//ArticleTitle")
-                title = "".join(title_elem.itertext()) if title_elem is not None else "No title"
-
-                abstract_elem = article.find(".//AbstractText")
-                abstract = "".join(abstract_elem.itertext()) if abstract_elem is not None else "No abstract available"
-                
-                # Authors
-                authors = []
-                for author in article.findall(".//Author"):
-                    lastname = author.find("LastName")
-                    forename = author.find("ForeName")
-                    if lastname is not None and forename is not None:
-                        authors.append(f"{forename.text} {lastname.text}")
-                
-                # Publication date
-                pub_date = article.find(".//PubDate")
-                year = pub_date.find("Year").text if pub_date.find("Year") is not None else "2024"
-                month = pub_date.find("Month").text if pub_date.find("Month") is not None else "01"
-                day = pub_date.find("Day").text if pub_date.find("Day") is not None else "01"
-                
-                # Convert month name to number if needed
-                month_map = {"Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04", "May": "05", "Jun": "06",
-                            "Jul": "07", "Aug": "08", "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"}
-                month = month_map.get(month, month if month.isdigit() else "01")
-                
-                published = datetime.strptime(f"{year}-{month}-{day}", "%Y-%m-%d")
-                # Cap future placeholder dates (epub-ahead-of-print) at today
-                if published > datetime.utcnow():
-                    published = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-                
-                papers.append({
-                    "id": f"PMID:{pmid}",
-                    "title": title,
-                    "authors": ", ".join(authors) if authors else "Unknown",
-                    "abstract": abstract,
-                    "published": published,
-                    "pdf_url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-                })
-            except Exception as e:
-                continue
+        for article in findall(root, ".//PubmedArticle"):
+            paper = self._parse_article(article)
+            if paper:
+                papers.append(paper)
         
         return papers
+    
+    async def iter_parse_pubmed(self, chunks):
+        """Parse a PubMed XML byte stream incrementally, one article at a time
+        
+        Each PubmedArticle is released as soon as it has been parsed, so
+        memory stays flat regardless of batch size.
+        """
+        async for article in iter_elements(chunks, "PubmedArticle"):
+            paper = self._parse_article(article)
+            if paper:
+                yield paper
+    
+    def _parse_article(self, article):
+        """Build a paper dict from one PubmedArticle element, or None if malformed"""
+        try:
+            pmid = find(article, ".//PMID").text
+            
+            title_elem = find(article, ".//ArticleTitle")
+            title = "".join(title_elem.itertext()) if title_elem is not None else "No title"
+
+            abstract_elem = find(article, ".//AbstractText")
+            abstract = "".join(abstract_elem.itertext()) if abstract_elem is not None else "No abstract available"
+            
+            # Authors
+            authors = []
+            for author in findall(article, ".//Author"):
+                lastname = author.find("LastName")
+                forename = author.find("ForeName")
+                if lastname is not None and forename is not None:
+                    authors.append(f"{forename.text} {lastname.text}")
+            
+            # Publication date
+            pub_date = find(article, ".//PubDate")
+            year = pub_date.find("Year").text if pub_date.find("Year") is not None else "2024"
+            month = pub_date.find("Month").text if pub_date.find("Month") is not None else "01"
+            day = pub_date.find("Day").text if pub_date.find("Day") is not None else "01"
+            
+            # Convert month name to number if needed
+            month_map = {"Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04", "May": "05", "Jun": "06",
+                        "Jul": "07", "Aug": "08", "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"}
+            month = month_map.get(month, month if month.isdigit() else "01")
+            
+            published = datetime.strptime(f"{year}-{month}-{day}", "%Y-%m-%d")
+            # Cap future placeholder dates (epub-ahead-of-print) at today
+            if published > datetime.utcnow():
+                published = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            
+            return {
+                "id": f"PMID:{pmid}",
+                "title": title,
+                "authors": ", ".join(authors) if authors else "Unknown",
+                "abstract": abstract,
+                "published": published,
+                "pdf_url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+            }
+        except Exception:
+            return None
+
+
+def parse_pubmed_payload(payload):
+    """Parse an efetch response body; module-level so the parse pool can pickle it"""
+    return PubmedScraper().parse_pubmed_response(payload)
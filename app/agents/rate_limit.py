@@ -0,0 +1,164 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+
+class RateLimiter:
+    """Space out request starts across concurrent tasks.
+
+    Every caller awaits wait() before issuing a request; consecutive request
+    starts are at least `interval` seconds apart regardless of how many
+    tasks share the limiter.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next_slot - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now += delay
+            self._next_slot = now + self.interval
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Per-host AIMD controller for request rate and concurrency.
+
+    Healthy responses raise the rate and the number of requests in flight
+    additively; 429/503, timeouts and latency well above the running
+    baseline cut both multiplicatively. A Retry-After header holds every
+    request to the host until it has passed. The interval never drops below
+    `min_interval`, which is the fastest the upstream's policy allows.
+    """
+
+    def __init__(self, interval: float, min_interval: float, max_concurrency: int):
+        super().__init__(interval)
+        self.min_interval = min_interval
+        self.max_concurrency = max_concurrency
+        self.concurrency = 1.0
+        self.latency = None  # EWMA of healthy response latency
+        self._in_flight = 0
+        self._slot_free = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the allowed concurrent requests, spaced by the interval"""
+        async with self._slot_free:
+            await self._slot_free.wait_for(lambda: self._in_flight < int(self.concurrency))
+            self._in_flight += 1
+        try:
+            await self.wait()
+            yield
+        finally:
+            async with self._slot_free:
+                self._in_flight -= 1
+                self._slot_free.notify_all()
+
+    def record(self, status: Optional[int], latency: float, retry_after: Optional[float] = None):
+        """Feed back the outcome of one request (status None = transport error)"""
+        if retry_after:
+            loop = asyncio.get_running_loop()
+            self._next_slot = max(self._next_slot, loop.time() + retry_after)
+
+        if status in (429, 503) or status is None:
+            self._decrease()
+        elif status < 400:
+            if self.latency is not None and latency > self.latency * settings.RATE_LIMIT_LATENCY_FACTOR:
+                self._decrease()
+            else:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                self._increase()
+
+    def _increase(self):
+        # Additive: one more request per second, one more slot per window
+        if self.interval > 0:
+            rate = 1.0 / self.interval + settings.RATE_LIMIT_INCREASE
+            self.interval = max(self.min_interval, 1.0 / rate)
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+
+    def _decrease(self):
+        # Once per round trip, so a burst of failures counts as one signal
+        now = time.monotonic()
+        if now - self._last_decrease < (self.latency or self.interval):
+            return
+        self._last_decrease = now
+        self.interval = min(settings.RATE_LIMIT_MAX_INTERVAL, self.interval * 2)
+        self.concurrency = max(1.0, self.concurrency / 2)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Seconds to wait before retry `attempt` (0-based): Retry-After, else jittered exponential"""
+    if retry_after is not None:
+        return retry_after
+    delay = min(settings.RATE_LIMIT_MAX_BACKOFF, settings.RATE_LIMIT_BASE_BACKOFF * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds, from either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Learned (interval, concurrency) per host, carried over between event loops
+_learned: Dict[str, Tuple[float, float]] = {}
+_limiters: Dict[Tuple[asyncio.AbstractEventLoop, str], AdaptiveRateLimiter] = {}
+
+
+def _host_policy(host: str) -> Tuple[float, float, int]:
+    """(starting interval, minimum interval, max concurrency) for a host[:port], from settings"""
+    pubmed_min = settings.PUBMED_API_KEY_RATE_LIMIT if settings.NCBI_API_KEY else settings.PUBMED_RATE_LIMIT
+    max_concurrency = settings.RATE_LIMIT_MAX_CONCURRENCY
+    for base_url, start, minimum, most in (
+            (settings.BIORXIV_API_BASE, settings.BIORXIV_RATE_LIMIT, settings.BIORXIV_MIN_INTERVAL, max_concurrency),
+            (settings.PUBMED_API_BASE, pubmed_min, pubmed_min, max_concurrency),
+            (settings.ARXIV_API_BASE, settings.ARXIV_RATE_LIMIT, settings.ARXIV_RATE_LIMIT, settings.ARXIV_MAX_CONCURRENCY)):
+        if urlsplit(base_url).netloc == host:
+            return start, minimum, most
+    return settings.RATE_LIMIT_DELAY, settings.RATE_LIMIT_DELAY, max_concurrency
+
+
+def reset_limiters():
+    """Forget learned rates, so the next run starts from the configured intervals"""
+    _learned.clear()
+    _limiters.clear()
+
+
+def get_limiter(url: str) -> AdaptiveRateLimiter:
+    """Return the adaptive limiter for url's host (and port) on the running loop"""
+    loop = asyncio.get_running_loop()
+    host = urlsplit(url).netloc
+    key = (loop, host)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        for stale in [k for k in _limiters if k[0].is_closed()]:
+            old = _limiters.pop(stale)
+            _learned[stale[1]] = (old.interval, old.concurrency)
+        start, minimum, max_concurrency = _host_policy(host)
+        limiter = AdaptiveRateLimiter(start, minimum, max_concurrency)
+        if host in _learned:
+            interval, concurrency = _learned[host]
+            limiter.interval, limiter.concurrency = interval, min(concurrency, max_concurrency)
+        _limiters[key] = limiter
+    return limiter
@@ -1,42 +1,172 @@
-import httpx
 import asyncio
-import xml.etree.ElementTree as ET
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta, timezone
 from app.agents.base_scraper import BaseScraper
+from app.config import settings
+from app.exceptions import ScraperException
+from app.repositories import CheckpointRepository
+from app.http_client import borrow
+from app.agents.xml_stream import iter_elements
+from app.agents import xml_backend
+from app.agents.xml_backend import find, findall
+
+logger = logging.getLogger(__name__)
+
+ARXIV_NS = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
+ATOM_ENTRY = '{http://www.w3.org/2005/Atom}entry'
 
 class ArxivScraper(BaseScraper):
-    def __init__(self, base_url="https://export.arxiv.org/api/query"):
-        self.base_url = base_url
+    source = "arxiv"
     
-    async def fetch_recent_papers(self, max_results=10):
+    def __init__(self, base_url=None):
+        self.base_url = base_url or settings.ARXIV_API_BASE
+        self.failed_categories = []
+    
+    async def iter_papers(self, max_results=10, categories=None, days_back=None, checkpoint=None, page_size=None):
+        """Yield arXiv submissions from a submittedDate window, page by page.
+        
+        Each category (default: ARXIV_CATEGORIES; none = all of arXiv) is
+        paged with the `start` offset in ascending submission order, so
+        offsets stay stable as new papers arrive. Categories are queried
+        concurrently, but share one request in flight to arXiv
+        (ARXIV_MAX_CONCURRENCY) with request starts at least
+        ARXIV_RATE_LIMIT apart. Papers are yielded as pages arrive,
+        deduplicated across categories, up to max_results in total.
+        
+        The window starts `days_back` days ago (default: ARXIV_DAYS_BACK),
+        or, for a category with a checkpoint, at its date and offset.
+        `checkpoint` is the mapping returned by get_checkpoint(). Once
+        exhausted, self.checkpoint maps each category to the point reached:
+        the offset it stopped at (after the cap or a failed page), or the
+        newest submission date once drained.
+        """
+        if categories is None:
+            categories = settings.ARXIV_CATEGORIES
+        categories = list(categories) or [""]
+        checkpoints = checkpoint or {}
+        page_size = page_size or settings.ARXIV_PAGE_SIZE
+        now = datetime.utcnow()
+        default_start = now - timedelta(days=days_back if days_back is not None else settings.ARXIV_DAYS_BACK)
+        self.checkpoint = None
+        self.failed_categories = []
+        
+        # Per category: window start, offset consumed so far, newest submission seen
+        state = {}
+        for category in categories:
+            cp = checkpoints.get(category)
+            if cp and cp.last_date:
+                state[category] = {"start": cp.last_date, "offset": cp.cursor or 0, "newest": None, "last_id": cp.last_id}
+            else:
+                state[category] = {"start": default_start, "offset": 0, "newest": None, "last_id": None}
+        
+        pages: asyncio.Queue = asyncio.Queue(maxsize=len(categories))
+        
+        async with borrow(self.base_url) as client:
+            async def page_through(category):
+                window = f"submittedDate:[{state[category]['start']:%Y%m%d%H%M} TO {now:%Y%m%d%H%M}]"
+                search_query = f"cat:{category} AND {window}" if category else window
+                start = state[category]["offset"]
+                try:
+                    while True:
+                        papers = await self._fetch_page(client, search_query, start, page_size)
+                        await pages.put((category, start, papers))
+                        if len(papers) < page_size:
+                            break
+                        start += len(papers)
+                    await pages.put((category, None, None))
+                except Exception as e:
+                    await pages.put((category, None, e))
+            
+            tasks = [asyncio.create_task(page_through(c)) for c in categories]
+            seen_ids = set()
+            count = 0
+            running = len(categories)
+            try:
+                while running and count < max_results:
+                    category, start, papers = await pages.get()
+                    cat_state = state[category]
+                    if start is None:
+                        running -= 1
+                        if papers is None:
+                            cat_state["drained"] = True
+                        else:
+                            logger.warning(f"arXiv category '{category or 'all'}' stopped at offset {cat_state['offset']}: {papers}")
+                            self.failed_categories.append(category)
+                        continue
+                    for i, paper in enumerate(papers):
+                        cat_state["offset"] = start + i + 1
+                        cat_state["last_id"] = paper["id"]
+                        published = paper["published"].astimezone(timezone.utc).replace(tzinfo=None)
+                        if cat_state["newest"] is None or published > cat_state["newest"]:
+                            cat_state["newest"] = published
+                        if paper["id"] in seen_ids:
+                            continue
+                        seen_ids.add(paper["id"])
+                        yield paper
+                        count += 1
+                        if count >= max_results:
+                            break
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        if len(self.failed_categories) == len(categories):
+            raise ScraperException(f"arXiv scrape failed for all categories: {', '.join(c or 'all' for c in categories)}")
+        
+        self.checkpoint = {}
+        for category, cat_state in state.items():
+            if cat_state.get("drained"):
+                last_date = cat_state["newest"] or cat_state["start"]
+                self.checkpoint[category] = {"last_date": last_date, "cursor": 0, "last_id": cat_state["last_id"]}
+            else:
+                self.checkpoint[category] = {"last_date": cat_state["start"], "cursor": cat_state["offset"],
+                                             "last_id": cat_state["last_id"]}
+    
+    async def _fetch_page(self, client, search_query, start, page_size):
+        """Fetch one page of results, retrying the same offset on failure"""
         params = {
-            "search_query": "all",
+            "search_query": search_query,
             "sortBy": "submittedDate",
-            "sortOrder": "descending",
-            "max_results": max_results
+            "sortOrder": "ascending",
+            "start": start,
+            "max_results": page_size
         }
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            for attempt in range(3):
-                try:
-                    response = await client.get(self.base_url, params=params)
-                    response.raise_for_status()
-                    await asyncio.sleep(0.34)
-                    return self.parse_arxiv_response(response.text)
-                except Exception as e:
-                    if attempt == 2:
-                        raise
-                    await asyncio.sleep(1)
+        return await self._request(client, self.base_url, params, stream_parser=self.iter_parse_arxiv,
+                                   payload_parser=parse_arxiv_payload)
+    
+    def get_checkpoint(self, db, query=None):
+        """Load the stored offsets, keyed by category (query: comma-separated categories)"""
+        categories = query.split(",") if query else settings.ARXIV_CATEGORIES or [""]
+        repo = CheckpointRepository(db)
+        checkpoints = {category: repo.get(self.source, category) for category in categories}
+        return {category: cp for category, cp in checkpoints.items() if cp}
+    
+    def save_checkpoint(self, db, query=None):
+        """Persist the offsets reached by the last fetch, one per category"""
+        repo = CheckpointRepository(db)
+        for category, state in (self.checkpoint or {}).items():
+            repo.save(self.source, category, **state)
     
     def parse_arxiv_response(self, xml_text):
-        root = ET.fromstring(xml_text)
-        ns = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
-        papers = []
-        for entry in root.findall('atom:entry', ns):
-            arxiv_id = entry.find('atom:id', ns).text.split('/abs/')[-1]
-            title = entry.find('atom:title', ns).text.strip()
-            abstract = entry.find('atom:summary', ns).text.strip()
-            published = datetime.fromisoformat(entry.find('atom:published', ns).text.replace('Z', '+00:00'))
-            authors = ', '.join([a.find('atom:name', ns).text for a in entry.findall('atom:author', ns)])
-            pdf_url = next((link.get('href') for link in entry.findall('atom:link', ns) if link.get('title') == 'pdf'), None)
-            papers.append({"id": arxiv_id, "title": title, "authors": authors, "abstract": abstract, "published": published, "pdf_url": pdf_url})
-        return papers
+        root = xml_backend.fromstring(xml_text)
+        return [self._parse_entry(entry) for entry in findall(root, 'atom:entry', ARXIV_NS)]
+    
+    async def iter_parse_arxiv(self, chunks):
+        """Parse an arXiv Atom byte stream incrementally, one entry at a time"""
+        async for entry in iter_elements(chunks, ATOM_ENTRY):
+            yield self._parse_entry(entry)
+    
+    def _parse_entry(self, entry):
+        ns = ARXIV_NS
+        arxiv_id = find(entry, 'atom:id', ns).text.split('/abs/')[-1]
+        title = find(entry, 'atom:title', ns).text.strip()
+        abstract = find(entry, 'atom:summary', ns).text.strip()
+        published = datetime.fromisoformat(find(entry, 'atom:published', ns).text.replace('Z', '+00:00'))
+        authors = ', '.join([find(a, 'atom:name', ns).text for a in findall(entry, 'atom:author', ns)])
+        pdf_url = next((link.get('href') for link in findall(entry, 'atom:link', ns) if link.get('title') == 'pdf'), None)
+        return {"id": arxiv_id, "title": title, "authors": authors, "abstract": abstract, "published": published, "pdf_url": pdf_url}
+
+
+def parse_arxiv_payload(payload):
+    """Parse an API response body; module-level so the parse pool can pickle it"""
+    return ArxivScraper().parse_arxiv_response(payload)
@@ -0,0 +1,95 @@
+"""XML parser backend for the PubMed and arXiv scrapers
+
+lxml, when installed, parses in C and evaluates the parsers' descendant
+lookups (".//PMID", ".//Author", ...) as XPath expressions compiled once,
+instead of ElementTree's per-call path interpretation and subtree walks.
+XML_PARSER picks the backend:
+
+    auto   lxml if importable, else ElementTree (the default)
+    lxml   lxml, falling back to ElementTree with a warning if missing
+    etree  always ElementTree
+
+The parsers call find()/findall() from here with the same ElementTree
+paths on either kind of element, so both backends produce the same papers.
+"""
+import logging
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    lxml_etree = None
+    LXML_AVAILABLE = False
+
+# Errors either backend raises on malformed input
+ParseError = (ET.ParseError, lxml_etree.XMLSyntaxError) if LXML_AVAILABLE else (ET.ParseError,)
+
+_warned = False
+
+
+def use_lxml() -> bool:
+    global _warned
+    if settings.XML_PARSER == "etree":
+        return False
+    if settings.XML_PARSER == "lxml" and not LXML_AVAILABLE and not _warned:
+        logger.warning("XML_PARSER=lxml but lxml is not installed; using ElementTree")
+        _warned = True
+    return LXML_AVAILABLE
+
+
+def _lxml_parser():
+    # No entity expansion or network access for upstream documents
+    return lxml_etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+
+
+def fromstring(payload):
+    """Parse a whole document (str or bytes) and return its root element"""
+    if use_lxml():
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        return lxml_etree.fromstring(payload, _lxml_parser())
+    return ET.fromstring(payload)
+
+
+def pull_parser(tag: str):
+    """A push parser emitting ("end", element) for each completed `tag`.
+
+    Returns (parser, filtered): when filtered is False the caller must
+    match the tag and track the root itself, as with ET.XMLPullParser.
+    """
+    if use_lxml():
+        return lxml_etree.XMLPullParser(events=("end",), tag=tag, resolve_entities=False,
+                                        no_network=True, huge_tree=True), True
+    return ET.XMLPullParser(events=("start", "end")), False
+
+
+@lru_cache(maxsize=None)
+def _xpath(path: str, first: bool, namespaces: Optional[tuple]):
+    expression = f"({path})[1]" if first else path
+    return lxml_etree.XPath(expression, namespaces=dict(namespaces) if namespaces else None)
+
+
+def _is_lxml(elem) -> bool:
+    return LXML_AVAILABLE and isinstance(elem, lxml_etree._Element)
+
+
+def find(elem, path: str, namespaces: Optional[dict] = None):
+    """elem.find(path), as compiled XPath for lxml elements"""
+    if _is_lxml(elem):
+        found = _xpath(path, True, tuple(namespaces.items()) if namespaces else None)(elem)
+        return found[0] if found else None
+    return elem.find(path, namespaces)
+
+
+def findall(elem, path: str, namespaces: Optional[dict] = None):
+    """elem.findall(path), as compiled XPath for lxml elements"""
+    if _is_lxml(elem):
+        return _xpath(path, False, tuple(namespaces.items()) if namespaces else None)(elem)
+    return elem.findall(path, namespaces)
@@ -0,0 +1,39 @@
+from app.agents.xml_backend import pull_parser
+
+
+async def iter_elements(chunks, tag):
+    """Yield each completed `tag` element from an async stream of XML bytes.
+
+    This is iterparse driven by a push parser, so it can consume an httpx
+    byte stream as it arrives. Once the consumer has handled an element,
+    everything parsed so far is cleared from the tree, so memory stays
+    bounded by the size of a single element.
+    """
+    parser, filtered = pull_parser(tag)
+    root = None
+
+    def completed():
+        nonlocal root
+        for event, elem in parser.read_events():
+            if filtered:
+                # lxml: only `tag` end events; drop it and its earlier siblings
+                yield elem
+                elem.clear(keep_tail=True)
+                parent = elem.getparent()
+                if parent is not None:
+                    while elem.getprevious() is not None:
+                        del parent[0]
+            elif event == "start":
+                if root is None:
+                    root = elem
+            elif elem.tag == tag:
+                yield elem
+                root.clear()
+
+    async for chunk in chunks:
+        parser.feed(chunk)
+        for elem in completed():
+            yield elem
+    parser.close()
+    for elem in completed():
+        yield elem
@@ -0,0 +1,88 @@
+"""Splitting Paper.authors strings into individual, normalized names
+
+Each source formats its author list differently:
+  biorxiv  "Smith, J. A.; van der Berg, K."  (";" between authors, "Last, Initials")
+  pubmed   "Jane A Smith, Kees van der Berg"  ("," between authors, "Forename Lastname")
+  arxiv    "Jane Smith, Kees van der Berg"
+so splitting has to know which one it is reading.
+
+Names are matched on a lookup key of last name plus first initial
+("smith j"), the most that "Smith, J." and "Jane Smith" have in common.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+# Lowercase particles that belong to the last name in "First Last" order
+PARTICLES = {"van", "von", "der", "den", "de", "del", "della", "di", "da", "dos", "du", "la", "le", "ter", "ten"}
+
+
+class AuthorName(NamedTuple):
+    name: str             # As displayed: "Jane A. Smith" or "J. A. Smith"
+    normalized_name: str  # ASCII lowercase "first last", unique per author
+    lookup_key: str       # "last f", shared by every spelling of a name
+
+
+def source_of(paper_id: str) -> str:
+    """Source of a stored paper, from the shape of its identifier"""
+    if paper_id.startswith("PMID:"):
+        return "pubmed"
+    if paper_id.startswith("10."):
+        return "biorxiv"
+    return "arxiv"
+
+
+@lru_cache(maxsize=65536)  # The same names recur across papers
+def fold(text: str) -> str:
+    """ASCII lowercase words: "Müller-Lüdenscheidt" -> "muller ludenscheidt" """
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_ALNUM.sub(" ", text.lower()).split())
+
+
+def make_name(first: str, last: str) -> Optional[AuthorName]:
+    """AuthorName from a first and last name, None if the last name is empty"""
+    first, last = " ".join(first.split()), " ".join(last.split())
+    folded_last = fold(last)
+    if not folded_last:
+        return None
+    folded_first = fold(first)
+    name = f"{first} {last}".strip()
+    key = f"{folded_last} {folded_first[0]}" if folded_first else folded_last
+    return AuthorName(name, f"{folded_first} {folded_last}".strip(), key)
+
+
+def split_first_last(full_name: str):
+    """("Kees", "van der Berg") from "Kees van der Berg": the last word plus any particles before it"""
+    words = full_name.split()
+    if not words:
+        return "", ""
+    start = len(words) - 1
+    while start > 1 and words[start - 1].lower() in PARTICLES:
+        start -= 1
+    return " ".join(words[:start]), " ".join(words[start:])
+
+
+def parse_authors(text: Optional[str], source: str) -> List[AuthorName]:
+    """Individual authors of a Paper.authors string, in order, without repeats"""
+    if not text or text.strip() == "Unknown":
+        return []
+    names = []
+    if source == "biorxiv":
+        for part in text.split(";"):
+            last, _, first = part.partition(",")
+            names.append(make_name(first, last) if first.strip() else make_name(*split_first_last(part)))
+    else:
+        names = [make_name(*split_first_last(part)) for part in text.split(",")]
+
+    seen, authors = set(), []
+    for author in names:
+        if author and author.normalized_name not in seen:
+            seen.add(author.normalized_name)
+            authors.append(author)
+    return authors
+
@@ -4,6 +4,7 @@ from rich.table import Table
 from datetime import datetime
 from app.cli import console
 from app.config import settings
+from app.http_client import get_client
 
 API_BASE = "http://localhost:8000"
 
@@ -16,13 +17,14 @@ def jobs():
 def status():
     """Show processing status"""
     from app.database import SessionLocal
-    from app.models import Paper
+    from app.services.stats import get_stats
     
     db = SessionLocal()
     try:
-        total = db.query(Paper).count()
-        processed = db.query(Paper).filter(Paper.summary != None, Paper.summary != "").count()
-        unprocessed = total - processed
+        stats = get_stats(db)
+        total = stats["total_papers"]
+        processed = stats["processed"]
+        unprocessed = stats["unprocessed"]
         
         table = Table(title="Processing Status")
         table.add_column("Metric", style="cyan")
@@ -31,6 +33,10 @@ def status():
         table.add_row("Total Papers", str(total))
         table.add_row("Processed", str(processed))
         table.add_row("Unprocessed", str(unprocessed))
+        if stats["processing"]:
+            table.add_row("In Progress", str(stats["processing"]))
+        if stats["failed"]:
+            table.add_row("Failed", str(stats["failed"]))
         
         if processed > 0:
             rate = round(processed / total * 100, 2)
@@ -44,7 +50,7 @@ def status():
 def scheduler():
     """Show scheduler status and upcoming jobs"""
     try:
-        response = httpx.get(f"{API_BASE}/jobs/scheduler/status", timeout=5.0)
+        response = get_client().get(f"{API_BASE}/jobs/scheduler/status", timeout=5.0)
         response.raise_for_status()
         data = response.json()
         
@@ -87,22 +93,28 @@ def scheduler():
         console.print(f"[red]✗ Error: {e}[/red]")
 
 @jobs.command()
-@click.option('--source', type=click.Choice(['biorxiv', 'pubmed', 'all']), default='all', help='Source to scrape')
+@click.option('--source', type=click.Choice(['biorxiv', 'pubmed', 'arxiv', 'all']), default='all', help='Source to scrape')
 @click.option('--max-results', type=int, help='Maximum papers to fetch (default: use config)')
-@click.option('--days-back', type=int, help='Days to look back for bioRxiv (default: use config)')
+@click.option('--days-back', type=int, help='Days to look back for bioRxiv/arXiv (default: use config)')
 @click.option('--query', type=str, help='Keyword filter for scraping (bioRxiv: client-side filter; PubMed: server-side query)')
-def trigger_scrape(source, max_results, days_back, query):
+@click.option('--category', multiple=True, help='arXiv category, e.g. q-bio.GN (can specify multiple; default: use config)')
+@click.option('--full', is_flag=True, help='Ignore saved checkpoints and fetch the whole range')
+def trigger_scrape(source, max_results, days_back, query, category, full):
     """Manually trigger scraping with custom options"""
-    import asyncio
     from datetime import datetime
+    from app.http_client import run
     from app.agents.biorxiv_scraper import BiorxivScraper
     from app.agents.pubmed_scraper import PubmedScraper
+    from app.agents.scraper import ArxivScraper
     from app.database import SessionLocal
     from app.models import JobHistory
     
     db = SessionLocal()
     try:
-        sources = ['biorxiv', 'pubmed'] if source == 'all' else [source]
+        if source == 'all':
+            sources = ['biorxiv', 'pubmed'] + (['arxiv'] if settings.ARXIV_CATEGORIES else [])
+        else:
+            sources = [source]
         console.print(f"[cyan]Scraping: {', '.join(sources)}[/cyan]\n")
         
         for src in sources:
@@ -121,17 +133,22 @@ def trigger_scrape(source, max_results, days_back, query):
                     else:
                         console.print(f"[cyan]bioRxiv: {max_res} papers, last {days} days[/cyan]")
                     scraper = BiorxivScraper()
-                    papers = asyncio.run(scraper.fetch_recent_papers(
+                    checkpoint = None if full else scraper.get_checkpoint(db, biorxiv_query)
+                    if checkpoint:
+                        console.print(f"[dim]Resuming from checkpoint {checkpoint.last_date:%Y-%m-%d} (cursor {checkpoint.cursor})[/dim]")
+                    result = run(scraper.ingest(
+                        db,
                         max_results=max_res,
                         days_back=days,
-                        query=biorxiv_query
+                        query=biorxiv_query,
+                        checkpoint=checkpoint
                     ))
-                    saved = scraper.save_papers(db, papers)
-                    console.print(f"[green]✓ bioRxiv: fetched {len(papers)}, saved {saved}[/green]\n")
+                    scraper.save_checkpoint(db, biorxiv_query)
+                    console.print(f"[green]✓ bioRxiv: fetched {result['fetched']}, saved {result['saved']}[/green]\n")
                     
                     job.completed_at = datetime.utcnow()
                     job.status = 'success'
-                    job.result = {'fetched': len(papers), 'saved': saved}
+                    job.result = result
                 
                 elif src == 'pubmed':
                     max_res = max_results or settings.PUBMED_SCRAPE_MAX
@@ -139,16 +156,45 @@ def trigger_scrape(source, max_results, days_back, query):
                     
                     console.print(f"[cyan]PubMed: query='{search_query}', max={max_res}[/cyan]")
                     scraper = PubmedScraper()
-                    papers = asyncio.run(scraper.fetch_recent_papers(
+                    checkpoint = None if full else scraper.get_checkpoint(db, search_query)
+                    if checkpoint:
+                        console.print(f"[dim]Resuming from checkpoint {checkpoint.last_date:%Y-%m-%d}[/dim]")
+                    result = run(scraper.ingest(
+                        db,
+                        max_results=max_res,
+                        query=search_query,
+                        checkpoint=checkpoint
+                    ))
+                    scraper.save_checkpoint(db, search_query)
+                    console.print(f"[green]✓ PubMed: fetched {result['fetched']}, saved {result['saved']}[/green]\n")
+                    
+                    job.completed_at = datetime.utcnow()
+                    job.status = 'success'
+                    job.result = result
+                
+                elif src == 'arxiv':
+                    max_res = max_results or settings.ARXIV_SCRAPE_MAX
+                    categories = [c for c in category] or settings.ARXIV_CATEGORIES
+                    arxiv_query = ",".join(categories)
+                    
+                    console.print(f"[cyan]arXiv: categories={arxiv_query or 'all'}, max={max_res}[/cyan]")
+                    scraper = ArxivScraper()
+                    checkpoint = {} if full else scraper.get_checkpoint(db, arxiv_query)
+                    for cat, cp in checkpoint.items():
+                        console.print(f"[dim]{cat}: resuming from {cp.last_date:%Y-%m-%d %H:%M} (offset {cp.cursor})[/dim]")
+                    result = run(scraper.ingest(
+                        db,
                         max_results=max_res,
-                        query=search_query
+                        categories=categories,
+                        days_back=days_back,
+                        checkpoint=checkpoint
                     ))
-                    saved = scraper.save_papers(db, papers)
-                    console.print(f"[green]✓ PubMed: fetched {len(papers)}, saved {saved}[/green]\n")
+                    scraper.save_checkpoint(db, arxiv_query)
+                    console.print(f"[green]✓ arXiv: fetched {result['fetched']}, saved {result['saved']}[/green]\n")
                     
                     job.completed_at = datetime.utcnow()
                     job.status = 'success'
-                    job.result = {'fetched': len(papers), 'saved': saved}
+                    job.result = result
                 
                 db.commit()
             
@@ -202,22 +248,22 @@ def trigger_process(limit):
         db.close()
 
 @jobs.command()
-def stats():
+@click.option('--reconcile', is_flag=True, help='Recompute the counters from the tables first')
+def stats(reconcile):
     """Show comprehensive job statistics"""
-    from datetime import datetime, timedelta
     from app.database import SessionLocal
-    from app.models import Paper, Category
+    from app.services.stats import get_stats, reconcile_stats
     
     db = SessionLocal()
     try:
-        total = db.query(Paper).count()
-        processed = db.query(Paper).filter(Paper.summary != None, Paper.summary != "").count()
-        unprocessed = total - processed
-        
-        week_ago = datetime.now() - timedelta(days=7)
-        papers_this_week = db.query(Paper).filter(Paper.created_at >= week_ago).count()
-        
-        total_categories = db.query(Category).count()
+        if reconcile:
+            reconcile_stats(db)
+        stats = get_stats(db)
+        total = stats["total_papers"]
+        processed = stats["processed"]
+        unprocessed = stats["unprocessed"]
+        papers_this_week = stats["papers_this_week"]
+        total_categories = stats["total_categories"]
         
         console.print("[bold cyan]Job Statistics[/bold cyan]\n")
         
@@ -237,7 +283,7 @@ def stats():
         
         # Scheduler Status
         try:
-            response = httpx.get(f"{API_BASE}/jobs/scheduler/status", timeout=5.0)
+            response = get_client().get(f"{API_BASE}/jobs/scheduler/status", timeout=5.0)
             scheduler_data = response.json()
             console.print(f"[bold]Scheduler:[/bold] {scheduler_data.get('status', 'unknown')}")
             if scheduler_data.get("status") == "running":
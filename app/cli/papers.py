@@ -1,9 +1,9 @@
 import click
 import re
-import httpx
 from datetime import datetime
 from rich.table import Table
 from app.cli import console
+from app.http_client import get_client
 
 @click.group()
 def papers():
@@ -16,6 +16,7 @@ def add(doi):
     """Add a paper by DOI (bioRxiv format: 10.1101/...)"""
     from app.database import SessionLocal
     from app.models import Paper
+    from app.repositories import PaperRepository
     
     db = SessionLocal()
     try:
@@ -30,7 +31,7 @@ def add(doi):
             return
         
         url = f"https://api.biorxiv.org/details/biorxiv/{doi}"
-        response = httpx.get(url, timeout=30.0)
+        response = get_client().get(url)
         response.raise_for_status()
         data = response.json()
         
@@ -54,8 +55,7 @@ def add(doi):
             pdf_url=f"https://www.biorxiv.org/content/{doi}v1.full.pdf"
         )
         
-        db.add(paper)
-        db.commit()
+        PaperRepository(db).create(paper)
         console.print(f"[green]✓ Added paper (ID: {paper.id})[/green]")
         console.print(f"[white]{paper.title}[/white]")
         
@@ -101,42 +101,53 @@ def process(limit, ids):
 @click.option('--limit', default=20, help='Number of papers to show')
 @click.option('--unprocessed', is_flag=True, help='Show only unprocessed papers')
 @click.option('--category', multiple=True, help='Filter by category name (can specify multiple)')
-@click.option('--total', is_flag=True, help='Show total count in database')
-def list(limit, unprocessed, category, total):
-    """List papers"""
+@click.option('--total', is_flag=True, help='Show filtered and total counts in database')
+@click.option('--author', help='Filter by author ("Jane Smith", "Smith, J." or a last name)')
+@click.option('--cursor', help='Continue from the cursor printed under the previous page')
+def list(limit, unprocessed, category, total, author, cursor):
+    """List papers, newest first"""
+    from app.author_names import source_of
     from app.database import SessionLocal
-    from app.models import Paper, Category
-    from sqlalchemy.orm import aliased
+    from app.models import Paper, ProcessingState
+    from app.pagination import decode_cursor
+    from app.repositories import AuthorRepository
+    from app.repositories.paper_repository import PaperRepository
+    from sqlalchemy.orm import selectinload
+    
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        console.print(f"[red]✗ {e}[/red]")
+        return
     
     db = SessionLocal()
     try:
-        query = db.query(Paper)
+        query = db.query(Paper).options(selectinload(Paper.categories))
         
         if total:
             total_count = query.count()
         
         if unprocessed:
-            query = query.filter((Paper.summary == None) | (Paper.summary == ""))
+            query = query.filter(Paper.processing_state != ProcessingState.DONE)
+        repo = PaperRepository(db)
         if category:
-            for cat in category:
-                cat_alias = aliased(Category)
-                query = query.join(cat_alias, Paper.categories).filter(
-                    cat_alias.name.ilike(f"%{cat}%")
-                )
-            query = query.distinct()
+            query = repo.filter_categories(query, category)
+        if author:
+            query = AuthorRepository(db).filter_papers(query, author)
         
-        filtered_count = query.count()
-        papers = query.order_by(Paper.created_at.desc()).limit(limit).all()
+        if total:
+            filtered_count = query.count()
+        papers, next_cursor = repo.paginate(query, limit, cursor=position)
         
         title = f"Papers ({len(papers)} shown"
         if total:
             title += f" of {filtered_count} filtered, {total_count} total"
-        else:
-            title += f" of {filtered_count}"
         title += ")"
         
         if category:
             title += f" - Categories: {', '.join(category)}"
+        if author:
+            title += f" - Author: {author}"
         
         table = Table(title=title)
         table.add_column("ID", style="cyan")
@@ -146,34 +157,59 @@ def list(limit, unprocessed, category, total):
         table.add_column("Processed", style="green")
         
         for paper in papers:
-            source = "arXiv" if "arxiv" in paper.arxiv_id.lower() else \
-                     "PubMed" if "PMID" in paper.arxiv_id else "bioRxiv"
-            processed = "✓" if paper.summary else "✗"
+            source = {"arxiv": "arXiv", "pubmed": "PubMed", "biorxiv": "bioRxiv"}[source_of(paper.arxiv_id)]
+            processed = "✓" if paper.processing_state == ProcessingState.DONE else "✗"
             cats = ", ".join([c.name for c in paper.categories]) if paper.categories else "-"
             table.add_row(str(paper.id), paper.title[:50], source, cats[:30], processed)
         
         console.print(table)
+        if next_cursor:
+            console.print(f"[dim]Next page: --cursor {next_cursor}[/dim]")
+    finally:
+        db.close()
+
+@papers.command('backfill-authors')
+@click.option('--batch-size', default=1000, help='Papers linked per transaction')
+def backfill_authors(batch_size):
+    """Split the authors of papers stored before author indexing into linked authors"""
+    from app.database import SessionLocal
+    from app.repositories import AuthorRepository
+    
+    db = SessionLocal()
+    try:
+        repo = AuthorRepository(db)
+        last_id, links = 0, 0
+        while True:
+            next_id, linked = repo.backfill(batch_size, after_id=last_id)
+            if next_id == last_id:
+                break
+            last_id, links = next_id, links + linked
+            console.print(f"[dim]... through paper {last_id}, {links} links[/dim]")
+        console.print(f"[green]✓ Linked {links} authorships[/green]")
     finally:
         db.close()
 
 @papers.command()
 @click.argument('query')
-def search(query):
-    """Search papers by keyword"""
+@click.option('--limit', default=20, help='Number of results to show')
+def search(query, limit):
+    """Search papers by keyword ("exact phrase", prefix*), best match first"""
+    from rich.markup import escape
     from app.database import SessionLocal
-    from app.models import Paper
+    from app.repositories.paper_repository import PaperRepository
     
     db = SessionLocal()
     try:
-        papers = db.query(Paper).filter(
-            (Paper.title.ilike(f"%{query}%")) | (Paper.abstract.ilike(f"%{query}%"))
-        ).limit(20).all()
+        results = PaperRepository(db).search(query, limit=limit, markers=("[bold yellow]", "[/bold yellow]"),
+                                             escape=escape)
         
-        console.print(f"[cyan]Found {len(papers)} papers matching '{query}'[/cyan]\n")
+        console.print(f"[cyan]Found {len(results)} papers matching '{escape(query)}'[/cyan]\n")
         
-        for paper in papers:
-            console.print(f"[bold]{paper.id}. {paper.title}[/bold]")
+        for paper, snippet in results:
+            console.print(f"[bold]{paper.id}. {escape(paper.title)}[/bold]")
             console.print(f"   {paper.arxiv_id} | {paper.published_date}")
+            if snippet:
+                console.print(f"   [dim]{snippet}[/dim]")
             console.print()
     finally:
         db.close()
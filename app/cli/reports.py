@@ -19,8 +19,9 @@ def report():
 def generate(start_date, end_date, category, keyword, save):
     """Generate a report for papers in a date range, optionally filtered by category or keyword"""
     from app.database import SessionLocal
-    from app.models import Paper, Category
-    from sqlalchemy.orm import aliased
+    from app.models import Paper
+    from app.repositories import PaperRepository
+    from sqlalchemy.orm import selectinload, undefer_group
 
     try:
         start_dt = datetime.strptime(start_date, '%Y-%m-%d')
@@ -31,19 +32,13 @@ def generate(start_date, end_date, category, keyword, save):
 
     db = SessionLocal()
     try:
-        query = db.query(Paper).filter(
+        query = db.query(Paper).options(selectinload(Paper.categories), undefer_group("text")).filter(
             Paper.created_at >= start_dt,
             Paper.created_at <= end_dt
         )
 
-        for cat in category:
-            cat_alias = aliased(Category)
-            query = query.join(cat_alias, Paper.categories).filter(
-                cat_alias.name.ilike(f"%{cat}%")
-            )
-
         if category:
-            query = query.distinct()
+            query = PaperRepository(db).filter_categories(query, category)
 
         papers = query.order_by(Paper.created_at.desc()).all()
 
@@ -109,8 +104,9 @@ def generate(start_date, end_date, category, keyword, save):
 def longread_transcriptomic(days_back, save_dir):
     """Generate a daily report for long-read transcriptomic methods papers"""
     from app.database import SessionLocal
-    from app.models import Paper, Category
-    from sqlalchemy.orm import aliased
+    from app.models import Paper
+    from app.repositories import CategoryRepository, PaperRepository
+    from sqlalchemy.orm import selectinload, undefer_group
     import os
 
     since_dt = datetime.utcnow() - timedelta(days=days_back)
@@ -123,24 +119,15 @@ def longread_transcriptomic(days_back, save_dir):
 
     db = SessionLocal()
     try:
-        query = db.query(Paper).filter(Paper.created_at >= since_dt)
+        query = db.query(Paper).options(selectinload(Paper.categories), undefer_group("text")).filter(
+            Paper.created_at >= since_dt)
 
         # Category filter (OR logic across target categories)
-        cat_filters = []
-        for cat_name in TARGET_CATEGORIES:
-            cat_alias = aliased(Category)
-            # Collect IDs from category-filtered subqueries
-            cat_filters.append(
-                db.query(Paper.id).join(cat_alias, Paper.categories).filter(
-                    cat_alias.name.ilike(f"%{cat_name}%")
-                ).subquery()
-            )
-
-        from sqlalchemy import or_, exists
-        category_paper_ids = set()
-        for sq in cat_filters:
-            ids = [row[0] for row in db.execute(sq)]
-            category_paper_ids.update(ids)
+        resolver = CategoryRepository(db)
+        target_ids = sorted({id for cat_name in TARGET_CATEGORIES for id in resolver.resolve(cat_name)})
+        category_paper_ids = {paper_id for (paper_id,) in PaperRepository(db).in_any_category(
+            db.query(Paper.id).filter(Paper.created_at >= since_dt), target_ids
+        )}
 
         papers_all = query.order_by(Paper.created_at.desc()).all()
 
@@ -216,11 +203,14 @@ def daily(save):
     """Generate daily report (papers from the last 24 hours)"""
     from app.database import SessionLocal
     from app.models import Paper
+    from sqlalchemy.orm import selectinload
 
     db = SessionLocal()
     try:
         since = datetime.utcnow() - timedelta(days=1)
-        papers = db.query(Paper).filter(Paper.created_at >= since).order_by(Paper.created_at.desc()).all()
+        papers = db.query(Paper).options(selectinload(Paper.categories)).filter(
+            Paper.created_at >= since
+        ).order_by(Paper.created_at.desc()).all()
 
         lines = [f"# Daily Paper Report — {datetime.utcnow().strftime('%Y-%m-%d')}\n"]
         lines.append(f"**{len(papers)} new papers in the last 24 hours**\n")
@@ -252,11 +242,14 @@ def weekly(save):
     """Generate weekly report (papers from the last 7 days)"""
     from app.database import SessionLocal
     from app.models import Paper
+    from sqlalchemy.orm import selectinload
 
     db = SessionLocal()
     try:
         since = datetime.utcnow() - timedelta(days=7)
-        papers = db.query(Paper).filter(Paper.created_at >= since).order_by(Paper.created_at.desc()).all()
+        papers = db.query(Paper).options(selectinload(Paper.categories)).filter(
+            Paper.created_at >= since
+        ).order_by(Paper.created_at.desc()).all()
 
         lines = [f"# Weekly Paper Report — {datetime.utcnow().strftime('%Y-%m-%d')}\n"]
         lines.append(f"**{len(papers)} new papers in the last 7 days**\n")
@@ -292,19 +285,18 @@ def categories():
 def list():
     """List all categories"""
     from app.database import SessionLocal
-    from app.models import Category
+    from app.repositories import CategoryRepository
 
     db = SessionLocal()
     try:
-        cats = db.query(Category).all()
+        cats = CategoryRepository(db).get_all_with_counts()
 
         table = Table(title=f"Categories ({len(cats)} total)")
         table.add_column("Name", style="cyan")
         table.add_column("Papers", style="green")
         table.add_column("Description", style="white", max_width=60)
 
-        for cat in cats:
-            paper_count = len(cat.papers)
+        for cat, paper_count in cats:
             desc = cat.description[:60] if cat.description else "-"
             table.add_row(cat.name, str(paper_count), desc)
 
@@ -317,15 +309,15 @@ def list():
 def stats():
     """Show database statistics"""
     from app.database import SessionLocal
-    from app.models import Paper, Category
+    from app.services.stats import get_stats
 
     db = SessionLocal()
     try:
-        total = db.query(Paper).count()
-        processed = db.query(Paper).filter(Paper.summary != None, Paper.summary != "").count()
-        week_ago = datetime.now() - timedelta(days=7)
-        recent = db.query(Paper).filter(Paper.created_at >= week_ago).count()
-        cat_count = db.query(Category).count()
+        stats = get_stats(db)
+        total = stats["total_papers"]
+        processed = stats["processed"]
+        recent = stats["papers_this_week"]
+        cat_count = stats["total_categories"]
 
         table = Table(title="Database Statistics")
         table.add_column("Metric", style="cyan")
@@ -8,7 +8,11 @@ from app.cli.jobs import jobs
 @click.version_option(version="1.0.0")
 def cli():
     """Paper Search CLI - Manage research papers from multiple sources"""
-    pass
+    from app.database import engine, Base
+    from app.migrations import run_migrations
+    import app.models  # noqa: F401 - register tables
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
 cli.add_command(papers)
 cli.add_command(report)
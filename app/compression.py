@@ -0,0 +1,127 @@
+"""Compressed storage for large text columns
+
+Off by default. CompressedText columns hold str values; TEXT_COMPRESSION
+picks how SQLite stores new writes:
+
+    none   plain TEXT, the default
+    zlib   a BLOB: a one-byte codec header, then the compressed UTF-8
+    zstd   as zlib, with zstandard when installed (else zlib, with a warning)
+
+The headers are \\x01 for zlib and \\x02 for zstd; \\x00 marks the
+uncompressed BLOBs earlier versions wrote. Values too short or too
+random to gain from compression stay TEXT. Every stored form is
+readable whatever the setting.
+
+On PostgreSQL the column is plain TEXT. TOAST already compresses large
+values, and the generated tsvector column and the ILIKE filters need
+the text.
+
+Every SQLite connection the app opens gets compress_text() and
+decompress_text() as SQL functions (see app/database.py). With
+compression on, the LIKE search fallback and the FTS5 triggers on
+papers call decompress_text(), so other SQLite clients that write to
+papers must register it too (register_sqlite_functions); see
+sync_text_storage in app/migrations.py.
+"""
+import logging
+import zlib
+from typing import Optional, Union
+
+from sqlalchemy import LargeBinary, Text, func
+from sqlalchemy.types import TypeDecorator
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+RAW, ZLIB, ZSTD = b"\x00", b"\x01", b"\x02"
+MIN_COMPRESS_BYTES = 128  # Shorter values are stored as is
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+_warned = False
+
+
+def codec() -> str:
+    """Codec used for new writes: "zlib", "zstd" or "none" """
+    global _warned
+    if settings.TEXT_COMPRESSION == "zstd" and not ZSTD_AVAILABLE:
+        if not _warned:
+            logger.warning("TEXT_COMPRESSION=zstd but zstandard is not installed; using zlib")
+            _warned = True
+        return "zlib"
+    return settings.TEXT_COMPRESSION
+
+
+def compress_text(text: Optional[str]) -> Union[bytes, str, None]:
+    """Compressed bytes for `text`, or the text itself when it is not compressed"""
+    if text is None:
+        return None
+    name = codec()
+    if name == "none":
+        return text
+    data = text.encode()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return text
+    if name == "zstd":
+        packed = ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        packed = ZLIB + zlib.compress(data, ZLIB_LEVEL)
+    return packed if len(packed) < len(data) else text
+
+
+def decompress_text(value: Union[bytes, str, None]) -> Optional[str]:
+    """Inverse of compress_text; str values (stored before compression) pass through"""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    header, body = value[:1], value[1:]
+    if header == ZLIB:
+        return zlib.decompress(body).decode()
+    if header == ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Text was stored with zstd compression; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(body).decode()
+    if header == RAW:
+        return body.decode()
+    return value.decode()
+
+
+def register_sqlite_functions(dbapi_connection):
+    """Make compress_text() and decompress_text() available to SQL on a sqlite3 connection"""
+    dbapi_connection.create_function("compress_text", 1, compress_text, deterministic=True)
+    dbapi_connection.create_function("decompress_text", 1, decompress_text, deterministic=True)
+
+
+def readable(column, dialect_name: str):
+    """SQL expression for the text of a CompressedText column, for filters"""
+    return func.decompress_text(column) if dialect_name == "sqlite" and codec() != "none" else column
+
+
+class CompressedText(TypeDecorator):
+    """Text, compressed on write and decompressed when rows are read (PostgreSQL: plain TEXT)
+
+    Map CompressedText columns as deferred (app/models.py). A query that
+    does not undefer them neither reads nor decompresses their bytes until
+    an attribute is first accessed.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def bind_processor(self, dialect):
+        return None if dialect.name == "postgresql" else compress_text
+
+    def result_processor(self, dialect, coltype):
+        return None if dialect.name == "postgresql" else decompress_text
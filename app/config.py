@@ -7,27 +7,83 @@ class Settings:
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./paper_search.db")
     
+    # Text storage (see app/compression.py)
+    TEXT_COMPRESSION: str = os.getenv("TEXT_COMPRESSION", "none")  # none, zlib or zstd (needs zstandard); SQLite only
+    SUMMARY_REFERENCES_ABSTRACT: bool = os.getenv("SUMMARY_REFERENCES_ABSTRACT", "true").lower() == "true"  # Don't store a summary that equals the abstract twice
+    
     # API URLs
     ARXIV_API_BASE: str = os.getenv("ARXIV_API_BASE", "https://export.arxiv.org/api/query")
     BIORXIV_API_BASE: str = os.getenv("BIORXIV_API_BASE", "https://api.biorxiv.org/details/biorxiv")
     PUBMED_API_BASE: str = os.getenv("PUBMED_API_BASE", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils")
     
-    # Rate Limiting
-    RATE_LIMIT_DELAY: float = 0.34  # seconds (3 requests per second)
+    # HTTP client pool (shared by scrapers, CLI and scheduler)
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"  # Needs the h2 package (httpx[http2])
+    
+    # HTTP response cache (opt-in; see app/http_cache.py)
+    HTTP_CACHE_ENABLED: bool = os.getenv("HTTP_CACHE_ENABLED", "false").lower() == "true"
+    HTTP_CACHE_DIR: str = os.getenv("HTTP_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".http_cache"))
+    HTTP_CACHE_MAX_BYTES: int = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+    # Seconds before revalidating; 0 turns the cache off for that host
+    HTTP_CACHE_TTL_BIORXIV: float = float(os.getenv("HTTP_CACHE_TTL_BIORXIV", str(6 * 3600)))
+    HTTP_CACHE_TTL_PUBMED: float = float(os.getenv("HTTP_CACHE_TTL_PUBMED", "3600"))
+    HTTP_CACHE_TTL_ARXIV: float = float(os.getenv("HTTP_CACHE_TTL_ARXIV", "3600"))
+    HTTP_CACHE_TTL_DEFAULT: float = float(os.getenv("HTTP_CACHE_TTL_DEFAULT", "3600"))
+    
+    # Rate Limiting (per-host adaptive controller, see app/agents/rate_limit.py)
+    RATE_LIMIT_DELAY: float = 0.34  # seconds (3 requests per second) for other hosts
     PUBMED_RATE_LIMIT: float = 0.34
-    BIORXIV_RATE_LIMIT: float = 0.5
+    PUBMED_API_KEY_RATE_LIMIT: float = 0.1  # NCBI allows 10 requests per second with an API key
+    BIORXIV_RATE_LIMIT: float = 0.5  # Starting interval; adapts down to BIORXIV_MIN_INTERVAL
+    BIORXIV_MIN_INTERVAL: float = 0.1
+    ARXIV_RATE_LIMIT: float = 3.0  # arXiv asks for one request every 3 seconds
+    ARXIV_MAX_CONCURRENCY: int = 1  # ... over a single connection at a time
+    RATE_LIMIT_INCREASE: float = 1.0  # Requests/second added per healthy response
+    RATE_LIMIT_MAX_INTERVAL: float = 30.0  # Slowest the controller backs off to
+    RATE_LIMIT_MAX_CONCURRENCY: int = 8  # Requests in flight per host
+    RATE_LIMIT_LATENCY_FACTOR: float = 3.0  # Latency above this multiple of the baseline counts as congestion
+    RATE_LIMIT_BASE_BACKOFF: float = 1.0  # Retry backoff doubles from here, with jitter
+    RATE_LIMIT_MAX_BACKOFF: float = 60.0
     
     # Defaults
     DEFAULT_MAX_RESULTS: int = 10
     DEFAULT_DAYS_BACK: int = 7
     DEFAULT_LIMIT: int = 20
+    CATEGORY_CACHE_SECONDS: int = 60  # Category name -> id map used by category filters
+    PAPER_TOTAL_CACHE_SECONDS: int = int(os.getenv("PAPER_TOTAL_CACHE_SECONDS", "30"))  # Reuse GET /papers totals per filter
     
     # Daily Scraping Configuration
     BIORXIV_SCRAPE_MAX: int = 1000  # Fetch up to 1000 papers
     BIORXIV_DAYS_BACK: int = 30      # From last 30 days (1 month)
     PUBMED_SCRAPE_QUERY: str = "longread OR transcriptomic OR acute lymphoblastic leukemia OR acute myeloid leukemia"  # Search query
     PUBMED_SCRAPE_MAX: int = 1000   # Fetch up to 1000 papers
+    PUBMED_BATCH_SIZE: int = 100    # Records per efetch request
+    PUBMED_CONCURRENCY: int = int(os.getenv("PUBMED_CONCURRENCY", "4"))  # efetch requests in flight
+    PUBMED_MAX_RETRIES: int = 3     # Retries per E-utilities request before giving up
+    NCBI_API_KEY: Optional[str] = os.getenv("NCBI_API_KEY")
     BIORXIV_SCRAPE_QUERY: str = os.getenv("BIORXIV_SCRAPE_QUERY", "")  # Keyword filter; empty = no filtering
+    BIORXIV_WINDOW_DAYS: int = int(os.getenv("BIORXIV_WINDOW_DAYS", "0"))  # Days per concurrent window; 0 = serial
+    BIORXIV_CONCURRENCY: int = int(os.getenv("BIORXIV_CONCURRENCY", "4"))  # Max windows fetched at once
+    
+    ARXIV_CATEGORIES: list = [c.strip() for c in os.getenv("ARXIV_CATEGORIES", "q-bio.GN,q-bio.QM").split(",") if c.strip()]
+    ARXIV_DAYS_BACK: int = 7        # Window for categories without a checkpoint
+    ARXIV_PAGE_SIZE: int = 100      # Entries per request (arXiv allows up to 2000)
+    ARXIV_SCRAPE_MAX: int = 1000    # Fetch up to 1000 papers across categories
+    SCRAPE_SOURCE_TIMEOUT: int = int(os.getenv("SCRAPE_SOURCE_TIMEOUT", "1800"))  # Seconds each source may run in the daily scrape
+    
+    # Ingest pipeline (fetch and save overlap)
+    INGEST_BATCH_SIZE: int = 100   # Papers per save_papers call
+    INGEST_QUEUE_SIZE: int = 500   # Papers buffered between fetcher and saver
+    DB_INSERT_CHUNK_SIZE: int = 500  # Rows per multi-row INSERT (7 bound parameters each)
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", "0"))  # Parse fetched XML in a worker pool; 0 = inline while streaming
+    PARSE_EXECUTOR: str = os.getenv("PARSE_EXECUTOR", "process")  # process or thread
+    XML_PARSER: str = os.getenv("XML_PARSER", "auto")  # auto (lxml if installed), lxml or etree
+    
+    # Debugging
+    QUERY_COUNT_HEADER: bool = os.getenv("QUERY_COUNT_HEADER", "false").lower() == "true"  # X-Query-Count on API responses
     
     # Email Configuration
     EMAIL_HOST: str = os.getenv("EMAIL_HOST", "smtp.gmail.com")
@@ -39,8 +95,11 @@ class Settings:
     MIN_ABSTRACT_LENGTH: int = 50  # Minimum length to use abstract as summary
     PROCESS_BATCH_SIZE: int = 10   # Papers to process per job run
     PROCESS_INTERVAL_MINUTES: int = 1  # Process every 1 minute
+    PROCESSING_STALE_MINUTES: int = 30  # Release papers claimed by a batch that never finished
+    STATS_RECONCILE_MINUTES: int = int(os.getenv("STATS_RECONCILE_MINUTES", "60"))  # Recompute the stats counters
     
     # Scheduler
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"  # Set false on all but one API process
     SCRAPE_SCHEDULE_HOUR: int = 6  # 6:00 AM
     PROCESS_INTERVAL_HOURS: int = 2
     REPORT_SCHEDULE_HOUR: int = 9  # 9:00 AM
@@ -1,19 +1,133 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.compression import register_sqlite_functions  # noqa: E402 - settings read after load_dotenv()
+
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./paper_search.db")
 
-# SQLite requires check_same_thread=False
-connect_args = {}
-if DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+# Storage profile, applied to every new SQLite connection:
+#   performance  WAL journal (readers don't block the writer), synchronous=NORMAL,
+#                a busy timeout instead of immediate "database is locked",
+#                larger page cache, memory-mapped reads, in-memory temp tables
+#   compat       driver defaults (rollback journal, no busy timeout)
+DB_PROFILE = os.getenv("DB_PROFILE", "performance")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Connection pool (API threadpool + scheduler thread + scrape workers)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+PROFILES = ("performance", "compat")
+
+
+def sqlite_pragmas(profile: str) -> list:
+    """PRAGMA statements run on each new connection for a storage profile"""
+    if profile == "compat":
+        return []
+    return [
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"mmap_size={SQLITE_MMAP_SIZE}",
+        "temp_store=MEMORY",
+    ]
+
+
+def build_engine(url: str, profile: str = None):
+    """Create an engine for url with the storage profile and pool sizing applied"""
+    profile = profile or DB_PROFILE
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile}' (expected one of: {', '.join(PROFILES)})")
+
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                             pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=True)
+
+    # SQLite requires check_same_thread=False
+    options = {"connect_args": {"check_same_thread": False}}
+    if make_url(url).database not in (None, "", ":memory:"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    engine = create_engine(url, **options)
+
+    pragmas = sqlite_pragmas(profile)
+
+    @event.listens_for(engine, "connect")
+    def apply_profile(dbapi_connection, connection_record):
+        register_sqlite_functions(dbapi_connection)
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    engine.info = {"profile": profile}
+    return engine
+
+
+def describe_storage(engine) -> str:
+    """One-line summary of the storage settings in effect, for startup logs"""
+    url = engine.url.render_as_string(hide_password=True)
+    pool = type(engine.pool).__name__
+    if pool == "QueuePool":
+        pool += f"(size={engine.pool.size()}, overflow={DB_MAX_OVERFLOW}, timeout={DB_POOL_TIMEOUT}s)"
+    if engine.dialect.name != "sqlite":
+        return f"{url} ({pool})"
+    with engine.connect() as conn:
+        values = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                  for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")}
+    pragmas = ", ".join(f"{name}={value}" for name, value in values.items())
+    return f"{url} profile={engine.info['profile']} ({pragmas}; {pool})"
+
+
+class QueryCounter:
+    """Statements executed while a count_queries() block is active"""
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+_query_counter = ContextVar("query_counter", default=None)
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements run by the current request, test or command
+    
+    Counting follows the context (contextvars), not the engine, so
+    concurrent requests don't see each other's queries; work handed to a
+    threadpool from inside the block is counted too.
+    """
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
+
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
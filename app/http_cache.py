@@ -0,0 +1,344 @@
+"""On-disk HTTP response cache for the shared clients
+
+Opt-in with HTTP_CACHE_ENABLED=true. Responses to GET requests are stored
+under HTTP_CACHE_DIR:
+
+    entries/<sha256 of url>.json   status, validators, timestamps, body hash
+    blobs/<sha256 of body>         response body, shared by identical payloads
+
+An entry younger than its source's TTL is served without touching the
+network. An older one is revalidated with If-None-Match / If-Modified-Since
+and served again on 304. A host whose TTL is 0 bypasses the cache. Since
+entries are keyed by URL and parameters only, the cache doubles as a
+record/replay store.
+
+PubMed efetch requests name their result set by the WebEnv and query_key
+an esearch returned, and those change every run. The cache remembers
+which esearch parameters each WebEnv/query_key came from (as it stores
+or serves the esearch response) and keys efetch on those instead, so an
+efetch page is reused across runs for the same search, retstart and
+retmax. An efetch whose esearch was not seen by this process is keyed on
+its WebEnv, and only hits within the run.
+
+Sizes are tracked in memory from one scan of entries/ at first use. Once
+the blobs pass HTTP_CACHE_MAX_BYTES, least recently used entries are
+dropped until they are back under EVICT_TO of it. Entries other
+processes add meanwhile are counted from the next start.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Kept out of the cache key (and so off disk)
+SECRET_PARAMS = {"api_key"}
+HISTORY_PARAMS = {"WebEnv", "query_key"}
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+HISTORY_SIZE = 1024  # esearch result sets remembered for keying efetch
+EVICT_TO = 0.9  # Fraction of max_bytes left after eviction
+
+
+class ResponseCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.entries = self.directory / "entries"
+        self.blobs = self.directory / "blobs"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.history = {}  # (WebEnv, query_key) -> esearch params
+        self._lock = threading.Lock()
+        self._index = None  # key -> (body, size, accessed_at)
+        self._refs = {}  # body -> entries using it
+        self._total = 0
+
+    def key(self, request: httpx.Request) -> str:
+        params = sorted((k, v) for k, v in request.url.params.multi_items() if k not in SECRET_PARAMS)
+        search = self.history.get((request.url.params.get("WebEnv"), request.url.params.get("query_key")))
+        if search:
+            params = [item for item in params if item[0] not in HISTORY_PARAMS] + [("search", search)]
+        url = request.url.copy_with(query=None)
+        return hashlib.sha256(json.dumps([request.method, str(url), params]).encode()).hexdigest()
+
+    @staticmethod
+    def ttl(request: httpx.Request) -> float:
+        host = request.url.host
+        for base_url, ttl in ((settings.BIORXIV_API_BASE, settings.HTTP_CACHE_TTL_BIORXIV),
+                              (settings.PUBMED_API_BASE, settings.HTTP_CACHE_TTL_PUBMED),
+                              (settings.ARXIV_API_BASE, settings.HTTP_CACHE_TTL_ARXIV)):
+            if urlsplit(base_url).hostname == host:
+                return ttl
+        return settings.HTTP_CACHE_TTL_DEFAULT
+
+    def caches(self, request: httpx.Request) -> bool:
+        return request.method == "GET" and self.ttl(request) > 0
+
+    def lookup(self, key: str) -> Optional[dict]:
+        try:
+            with open(self.entries / f"{key}.json") as f:
+                entry = json.load(f)
+            if not (self.blobs / entry["body"]).exists():
+                return None
+            return entry
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def prepare(self, request: httpx.Request, entry: Optional[dict]):
+        """Add conditional headers for revalidating a stale entry"""
+        if entry:
+            if entry["headers"].get("etag"):
+                request.headers["If-None-Match"] = entry["headers"]["etag"]
+            if entry["headers"].get("last-modified"):
+                request.headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+
+    def is_fresh(self, request: httpx.Request, entry: dict) -> bool:
+        return time.time() - entry["stored_at"] < self.ttl(request)
+
+    def respond(self, request: httpx.Request, key: str, entry: dict, revalidated: bool = False) -> httpx.Response:
+        entry["accessed_at"] = time.time()
+        if revalidated:
+            entry["stored_at"] = entry["accessed_at"]
+        self._write_entry(key, entry)
+        body = (self.blobs / entry["body"]).read_bytes()
+        self.note_history(request, body)
+        return httpx.Response(entry["status"], headers=entry["headers"], content=body, request=request)
+
+    def store(self, request: httpx.Request, key: str, response: httpx.Response, body: bytes) -> httpx.Response:
+        writer = self.blob_writer()
+        writer.write(body)
+        self.commit(request, key, response, writer)
+        headers = {h: response.headers[h] for h in STORED_HEADERS if h in response.headers}
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    def blob_writer(self) -> "BlobWriter":
+        return BlobWriter(self.blobs)
+
+    def commit(self, request: httpx.Request, key: str, response: httpx.Response, writer: "BlobWriter"):
+        """Store the body a BlobWriter received as the entry for `key`"""
+        digest, size = writer.finish()
+        now = time.time()
+        self._write_entry(key, {
+            "url": str(request.url.copy_with(query=None)),
+            "status": response.status_code,
+            "headers": {h: response.headers[h] for h in STORED_HEADERS if h in response.headers},
+            "body": digest,
+            "size": size,
+            "stored_at": now,
+            "accessed_at": now,
+        })
+        if request.url.params.get("usehistory") == "y":
+            self.note_history(request, (self.blobs / digest).read_bytes())
+        self.evict()
+
+    def note_history(self, request: httpx.Request, body: bytes):
+        """Remember the esearch parameters behind a WebEnv/query_key"""
+        if request.url.params.get("usehistory") != "y":
+            return
+        try:
+            result = json.loads(body)["esearchresult"]
+            history = (result["webenv"], result["querykey"])
+        except (ValueError, KeyError, TypeError):
+            return
+        search = sorted((k, v) for k, v in request.url.params.multi_items() if k not in SECRET_PARAMS)
+        with self._lock:
+            self.history.pop(history, None)
+            self.history[history] = search
+            while len(self.history) > HISTORY_SIZE:
+                del self.history[next(iter(self.history))]
+
+    def evict(self):
+        """Drop least recently used entries once the blobs outgrow max_bytes"""
+        with self._lock:
+            self._load_index()
+            if self._total <= self.max_bytes:
+                return
+            target = self.max_bytes * EVICT_TO
+            for key, _ in sorted(self._index.items(), key=lambda item: item[1][2]):
+                if self._total <= target:
+                    break
+                (self.entries / f"{key}.json").unlink(missing_ok=True)
+                self._untrack(key)
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        for path in self.entries.glob("*.json"):
+            try:
+                with open(path) as f:
+                    self._track(path.stem, json.load(f))
+            except (OSError, ValueError, KeyError):
+                path.unlink(missing_ok=True)
+
+    def _track(self, key: str, entry: dict):
+        """Record an entry's blob in the size index, replacing any previous entry for key"""
+        body = entry["body"]
+        self._refs[body] = self._refs.get(body, 0) + 1
+        if self._refs[body] == 1:
+            self._total += entry["size"]
+        if key in self._index:
+            self._untrack(key)
+        self._index[key] = (body, entry["size"], entry["accessed_at"])
+
+    def _untrack(self, key: str):
+        """Forget an entry, deleting its blob when no other entry uses it"""
+        body, size, _ = self._index.pop(key)
+        self._refs[body] -= 1
+        if self._refs[body] == 0:
+            del self._refs[body]
+            self._total -= size
+            (self.blobs / body).unlink(missing_ok=True)
+
+    def _write_entry(self, key: str, entry: dict):
+        path = self.entries / f"{key}.json"
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        with self._lock:
+            self._load_index()  # Before the replace, so the index sees the entry being replaced
+            os.replace(tmp, path)
+            self._track(key, entry)
+
+
+class BlobWriter:
+    """Writes a response body to a temp file, hashing it, then moves it into blobs/"""
+
+    def __init__(self, blobs: Path):
+        self.blobs = blobs
+        self.file = tempfile.NamedTemporaryFile(dir=blobs, suffix=".tmp", delete=False)
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.hash.update(chunk)
+        self.size += len(chunk)
+        self.file.write(chunk)
+
+    def finish(self):
+        """Close the temp file and move it into place; returns (digest, size)"""
+        self.file.close()
+        digest = self.hash.hexdigest()
+        blob = self.blobs / digest
+        if blob.exists():
+            os.unlink(self.file.name)
+        else:
+            os.replace(self.file.name, blob)
+        return digest, self.size
+
+    def discard(self):
+        self.file.close()
+        os.unlink(self.file.name)
+
+
+class CachingTransport(httpx.BaseTransport):
+    """Synchronous transport that serves GETs from a ResponseCache"""
+
+    def __init__(self, transport: httpx.BaseTransport, cache: ResponseCache):
+        self.transport = transport
+        self.cache = cache
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.cache.caches(request):
+            return self.transport.handle_request(request)
+        key = self.cache.key(request)
+        entry = self.cache.lookup(key)
+        if entry and self.cache.is_fresh(request, entry):
+            return self.cache.respond(request, key, entry)
+        self.cache.prepare(request, entry)
+        response = self.transport.handle_request(request)
+        if entry and response.status_code == 304:
+            response.close()
+            return self.cache.respond(request, key, entry, revalidated=True)
+        if response.status_code != 200:
+            return response
+        body = response.read()
+        response.close()
+        return self.cache.store(request, key, response, body)
+
+    def close(self):
+        self.transport.close()
+
+
+class _CachingStream(httpx.AsyncByteStream):
+    """Passes a response body through to the caller chunk by chunk while
+    writing it to the cache; stored once the body has been read to the end"""
+
+    def __init__(self, cache: ResponseCache, request: httpx.Request, key: str, response: httpx.Response):
+        self.cache = cache
+        self.request = request
+        self.key = key
+        self.response = response
+
+    async def __aiter__(self):
+        writer = await asyncio.to_thread(self.cache.blob_writer)
+        try:
+            async for chunk in self.response.aiter_bytes():
+                await asyncio.to_thread(writer.write, chunk)
+                yield chunk
+        except BaseException:
+            writer.discard()
+            raise
+        await asyncio.to_thread(self.cache.commit, self.request, self.key, self.response, writer)
+
+    async def aclose(self):
+        await self.response.aclose()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """Async transport that serves GETs from a ResponseCache
+
+    Disk IO runs in worker threads, and bodies fetched from the network
+    stream through to the caller as they are written to the cache.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: ResponseCache):
+        self.transport = transport
+        self.cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.cache.caches(request):
+            return await self.transport.handle_async_request(request)
+        key = self.cache.key(request)
+        entry = await asyncio.to_thread(self.cache.lookup, key)
+        if entry and self.cache.is_fresh(request, entry):
+            return await asyncio.to_thread(self.cache.respond, request, key, entry)
+        self.cache.prepare(request, entry)
+        response = await self.transport.handle_async_request(request)
+        if entry and response.status_code == 304:
+            await response.aclose()
+            return await asyncio.to_thread(self.cache.respond, request, key, entry, True)
+        if response.status_code != 200:
+            return response
+        headers = {h: response.headers[h] for h in STORED_HEADERS if h in response.headers}
+        return httpx.Response(200, headers=headers, request=request,
+                              stream=_CachingStream(self.cache, request, key, response))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Return the shared cache, or None when HTTP_CACHE_ENABLED is off"""
+    global _cache
+    if not settings.HTTP_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ResponseCache(settings.HTTP_CACHE_DIR, settings.HTTP_CACHE_MAX_BYTES)
+        logger.info(f"HTTP response cache enabled at {settings.HTTP_CACHE_DIR}")
+    return _cache
@@ -0,0 +1,121 @@
+"""Process-wide pooled HTTP clients
+
+Scrapers, the CLI and the scheduler borrow clients from here instead of
+opening their own, so TCP connections and TLS sessions are reused across
+pages, sources and runs. Async clients are kept per (event loop, host),
+since an httpx.AsyncClient cannot outlive the loop it was first used on;
+each host gets its own connection limits.
+"""
+import asyncio
+import atexit
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+from app.http_cache import get_cache, CachingTransport, AsyncCachingTransport
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "paper-search/1.0",
+}
+
+_async_clients: Dict[Tuple[asyncio.AbstractEventLoop, str], httpx.AsyncClient] = {}
+_sync_client: Optional[httpx.Client] = None
+_warned_http2 = False
+
+
+def _client_options(asynchronous: bool) -> dict:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    # httpx negotiates HTTP/2 via ALPN and falls back to 1.1 per host
+    http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+    global _warned_http2
+    if settings.HTTP2_ENABLED and not HTTP2_AVAILABLE and not _warned_http2:
+        logger.warning("HTTP2_ENABLED is set but the h2 package is missing; using HTTP/1.1 "
+                       "(install httpx[http2])")
+        _warned_http2 = True
+    options = {
+        "limits": limits,
+        "timeout": httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        "http2": http2,
+        "headers": DEFAULT_HEADERS,
+        "follow_redirects": True,
+    }
+    cache = get_cache()
+    if cache:
+        if asynchronous:
+            transport = AsyncCachingTransport(httpx.AsyncHTTPTransport(limits=limits, http2=http2), cache)
+        else:
+            transport = CachingTransport(httpx.HTTPTransport(limits=limits, http2=http2), cache)
+        options["transport"] = transport
+    return options
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """Return the shared async client for url's host on the running loop"""
+    loop = asyncio.get_running_loop()
+    key = (loop, urlsplit(url).netloc)
+    client = _async_clients.get(key)
+    if client is None or client.is_closed:
+        # Clients of loops that have since been closed are unusable; drop them
+        for stale in [k for k in _async_clients if k[0].is_closed()]:
+            del _async_clients[stale]
+        client = httpx.AsyncClient(**_client_options(asynchronous=True))
+        _async_clients[key] = client
+    return client
+
+
+@asynccontextmanager
+async def borrow(url: str):
+    """Borrow the shared async client for url's host; it stays open afterwards"""
+    yield get_async_client(url)
+
+
+def get_client() -> httpx.Client:
+    """Return the shared synchronous client (CLI commands)"""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(**_client_options(asynchronous=False))
+    return _sync_client
+
+
+async def aclose_clients():
+    """Close the async clients that belong to the running loop"""
+    loop = asyncio.get_running_loop()
+    for key in [k for k in _async_clients if k[0] is loop]:
+        await _async_clients.pop(key).aclose()
+
+
+def close_sync_client():
+    global _sync_client
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def run(coro):
+    """asyncio.run() that closes the clients the coroutine borrowed"""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await aclose_clients()
+    return asyncio.run(main())
+
+
+atexit.register(close_sync_client)
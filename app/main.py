@@ -1,7 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.routers import papers, categories, reports, jobs
+from app.database import engine, Base, describe_storage, count_queries
+from app.config import settings
+from app.migrations import run_migrations
+from app.routers import papers, categories, reports, jobs, authors
+from app import http_client
+from app.agents import parse_pool
 from contextlib import asynccontextmanager
 import logging
 
@@ -12,23 +16,33 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    logger.info(f"Database: {describe_storage(engine)}")
     
-    # Start scheduler
-    try:
-        from app.scheduler import start_scheduler
-        start_scheduler()
-        logger.info("Scheduler started")
-    except Exception as e:
-        logger.warning(f"Scheduler not started: {e}")
+    # Start scheduler (one per deployment; see SCHEDULER_ENABLED)
+    if settings.SCHEDULER_ENABLED:
+        try:
+            from app.scheduler import start_scheduler
+            start_scheduler()
+            logger.info("Scheduler started")
+        except Exception as e:
+            logger.warning(f"Scheduler not started: {e}")
+    else:
+        logger.info("Scheduler disabled (SCHEDULER_ENABLED=false)")
     
     yield
     
     # Shutdown
-    try:
-        from app.scheduler import stop_scheduler
-        stop_scheduler()
-    except:
-        pass
+    if settings.SCHEDULER_ENABLED:
+        try:
+            from app.scheduler import stop_scheduler
+            stop_scheduler()
+        except:
+            pass
+    
+    await http_client.aclose_clients()
+    http_client.close_sync_client()
+    parse_pool.shutdown()
 
 app = FastAPI(title="Paper Search API", lifespan=lifespan)
 
@@ -40,8 +54,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.QUERY_COUNT_HEADER:
+    @app.middleware("http")
+    async def query_count_header(request: Request, call_next):
+        """Report how many SQL statements each request ran (X-Query-Count)"""
+        with count_queries() as counter:
+            response = await call_next(request)
+        response.headers["X-Query-Count"] = str(counter.count)
+        return response
+
 app.include_router(papers.router, prefix="/papers", tags=["papers"])
 app.include_router(categories.router, prefix="/categories", tags=["categories"])
+app.include_router(authors.router, prefix="/authors", tags=["authors"])
 app.include_router(reports.router, prefix="/reports", tags=["reports"])
 app.include_router(jobs.router)
 
@@ -52,20 +76,15 @@ def root():
 @app.get("/stats")
 def get_stats():
     from app.database import SessionLocal
-    from app.models import Paper, Category
-    from datetime import datetime, timedelta
+    from app.services.stats import get_stats
     
     db = SessionLocal()
     try:
-        total_papers = db.query(Paper).count()
-        total_categories = db.query(Category).count()
-        week_ago = datetime.now() - timedelta(days=7)
-        papers_this_week = db.query(Paper).filter(Paper.created_at >= week_ago).count()
-        
+        stats = get_stats(db)
         return {
-            "total_papers": total_papers,
-            "total_categories": total_categories,
-            "papers_this_week": papers_this_week
+            "total_papers": stats["total_papers"],
+            "total_categories": stats["total_categories"],
+            "papers_this_week": stats["papers_this_week"]
         }
     finally:
         db.close()
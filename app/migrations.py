@@ -0,0 +1,264 @@
+"""Schema migrations for databases created before a model change
+
+Base.metadata.create_all() creates missing tables but never alters the
+ones that exist. Each migration below brings an existing database up to
+the current models. Migrations run in order at API and CLI startup,
+right after create_all(); each is applied once, in its own transaction,
+and recorded in schema_migrations. On a fresh database, where create_all()
+has already built the current schema, they only record themselves.
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text, DateTime
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.compression import codec
+from app.config import settings
+from app.models import Author, Paper, SchemaMigration, paper_authors, paper_categories
+from app.repositories.paper_repository import PG_SEARCH_CONFIG
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+
+def migration(name):
+    def register(func):
+        MIGRATIONS.append((name, func))
+        return func
+    return register
+
+
+def _columns(conn, table):
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _create_indexes(conn, table):
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+@migration("0001_paper_processing_state")
+def paper_processing_state(conn):
+    """Add papers.processing_state and backfill it from the summary column"""
+    columns = _columns(conn, "papers")
+    if "processing_state" not in columns:
+        conn.execute(text("ALTER TABLE papers ADD COLUMN processing_state VARCHAR NOT NULL DEFAULT 'pending'"))
+        conn.execute(text(
+            "UPDATE papers SET processing_state = CASE "
+            "WHEN summary IS NULL OR summary = '' THEN 'pending' ELSE 'done' END"
+        ))
+    if "processing_state_at" not in columns:
+        conn.execute(text(f"ALTER TABLE papers ADD COLUMN processing_state_at "
+                          f"{DateTime().compile(dialect=conn.dialect)}"))
+        conn.execute(text("UPDATE papers SET processing_state_at = created_at"))
+    _create_indexes(conn, Paper.__table__)
+
+
+@migration("0002_papers_fts")
+def papers_fts(conn):
+    """Create the FTS5 index over papers and the triggers that keep it in sync
+    
+    External-content table: the text lives only in papers, the index holds
+    tokens and rowids. Skipped on other engines and on SQLite builds
+    without FTS5, where search falls back to LIKE.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    try:
+        with conn.begin_nested():
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5("
+                "title, abstract, authors, content='papers', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            ))
+    except OperationalError as e:
+        logger.warning(f"Full-text search index not created, using LIKE search: {e}")
+        return
+    _create_fts_triggers(conn, "{row}.abstract")
+    conn.execute(text("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')"))
+
+
+def _create_fts_triggers(conn, abstract):
+    """(Re)create the triggers that keep papers_fts in sync; `abstract` reads it from {row}"""
+    new = f"new.id, new.title, {abstract.format(row='new')}, new.authors"
+    old = f"'delete', old.id, old.title, {abstract.format(row='old')}, old.authors"
+    triggers = {
+        "papers_fts_insert": f"AFTER INSERT ON papers BEGIN "
+                             f"INSERT INTO papers_fts(rowid, title, abstract, authors) VALUES ({new}); END",
+        "papers_fts_delete": f"AFTER DELETE ON papers BEGIN "
+                             f"INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors) VALUES ({old}); END",
+        "papers_fts_update": f"AFTER UPDATE OF title, abstract, authors ON papers BEGIN "
+                             f"INSERT INTO papers_fts(papers_fts, rowid, title, abstract, authors) VALUES ({old}); "
+                             f"INSERT INTO papers_fts(rowid, title, abstract, authors) VALUES ({new}); END",
+    }
+    for name, body in triggers.items():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+
+@migration("0003_postgres_search")
+def postgres_search(conn):
+    """PostgreSQL: a weighted tsvector column with a GIN index
+    
+    search_vector is a stored generated column, so the database keeps it
+    current on every write.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    vector = " || ".join(
+        f"setweight(to_tsvector('{PG_SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in (("title", "A"), ("authors", "B"), ("abstract", "C"))
+    )
+    conn.execute(text(f"ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                      f"GENERATED ALWAYS AS ({vector}) STORED"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_papers_search_vector ON papers USING GIN (search_vector)"))
+
+
+@migration("0004_papers_created_at_index")
+def papers_created_at_index(conn):
+    """Add the (created_at, id) index behind keyset pagination"""
+    _create_indexes(conn, Paper.__table__)
+
+
+@migration("0005_paper_categories_key")
+def paper_categories_key(conn):
+    """Give paper_categories a (paper_id, category_id) primary key, dropping duplicate links
+    
+    Neither SQLite nor a table holding duplicates can take a new primary
+    key in place, so the links are copied, once each, into a rebuilt table.
+    """
+    if not inspect(conn).get_pk_constraint("paper_categories")["constrained_columns"]:
+        before = conn.execute(text("SELECT COUNT(*) FROM paper_categories")).scalar()
+        conn.execute(text("ALTER TABLE paper_categories RENAME TO paper_categories_old"))
+        paper_categories.create(conn)
+        conn.execute(text(
+            "INSERT INTO paper_categories (paper_id, category_id) "
+            "SELECT DISTINCT paper_id, category_id FROM paper_categories_old "
+            "WHERE paper_id IS NOT NULL AND category_id IS NOT NULL"
+        ))
+        conn.execute(text("DROP TABLE paper_categories_old"))
+        after = conn.execute(text("SELECT COUNT(*) FROM paper_categories")).scalar()
+        logger.info(f"paper_categories: kept {after} links, dropped {before - after} duplicate or empty ones")
+    _create_indexes(conn, paper_categories)
+
+
+@migration("0006_authors")
+def authors(conn):
+    """Index the authors and paper_authors tables
+    
+    create_all() makes both; linking the papers already stored is left to
+    `papers backfill-authors`, which runs in batches while the API serves.
+    """
+    _create_indexes(conn, Author.__table__)
+    _create_indexes(conn, paper_authors)
+    unlinked = conn.execute(text(
+        "SELECT COUNT(*) FROM papers WHERE NOT EXISTS "
+        "(SELECT 1 FROM paper_authors WHERE paper_authors.paper_id = papers.id)"
+    )).scalar()
+    if unlinked:
+        logger.warning(f"{unlinked} papers have no author links; run `paper papers backfill-authors`")
+
+
+@migration("0007_compressed_text")
+def compressed_text(conn):
+    """Store summaries equal to the abstract as a flag
+    
+    Compressing the text (TEXT_COMPRESSION) is not a migration: it can be
+    switched on and off, and sync_text_storage converts the stored text
+    at each startup.
+    """
+    if "summary_from_abstract" not in _columns(conn, "papers"):
+        conn.execute(text("ALTER TABLE papers ADD COLUMN summary_from_abstract BOOLEAN NOT NULL DEFAULT FALSE"))
+    if settings.SUMMARY_REFERENCES_ABSTRACT:
+        conn.execute(text("UPDATE papers SET summary_from_abstract = TRUE, summary = NULL WHERE summary = abstract"))
+
+
+@migration("0008_drop_trigram_indexes")
+def drop_trigram_indexes(conn):
+    """PostgreSQL: drop the pg_trgm indexes earlier versions of 0003 created
+    
+    No query reads them: search goes through search_vector and category
+    filters resolve names to ids in Python, so they only slowed writes.
+    The extension itself is left installed.
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(text("DROP INDEX IF EXISTS ix_papers_title_trgm"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_categories_name_trgm"))
+
+
+def sync_text_storage(conn):
+    """SQLite: convert the stored text to match TEXT_COMPRESSION, if it was switched
+    
+    With compression off, text is plain TEXT and papers_fts indexes papers
+    through plain SQL triggers, so any SQLite client can write to papers.
+    With it on, abstracts, summaries and report contents are compressed,
+    and papers_fts reads abstracts through the papers_text view. The view
+    and the papers triggers call decompress_text(), which only connections
+    that register it have (app.compression.register_sqlite_functions):
+    writes to papers from the sqlite3 shell or other tools then fail with
+    "no such function". The papers_text view marks the compressed layout.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    compressed = codec() != "none"
+    if bool(conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'papers_text'")).first()) \
+            == compressed:
+        return
+    
+    text_bytes = ("SELECT (SELECT COALESCE(SUM(LENGTH(CAST(abstract AS BLOB))), 0) "
+                  "+ COALESCE(SUM(LENGTH(CAST(summary AS BLOB))), 0) FROM papers) "
+                  "+ (SELECT COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM reports)")
+    before = conn.execute(text(text_bytes)).scalar()
+    fts = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'papers_fts'")).first()
+    for trigger in ("papers_fts_insert", "papers_fts_delete", "papers_fts_update"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    
+    convert, stored_as = ("compress_text", "text") if compressed else ("decompress_text", "blob")
+    for table, column in (("papers", "abstract"), ("papers", "summary"), ("reports", "content")):
+        conn.execute(text(f"UPDATE {table} SET {column} = {convert}({column}) WHERE typeof({column}) = '{stored_as}'"))
+    after = conn.execute(text(text_bytes)).scalar()
+    logger.info(f"Text columns {'compressed' if compressed else 'decompressed'}: "
+                f"{before / 1024:.0f} KiB before, {after / 1024:.0f} KiB after")
+    
+    if compressed:
+        conn.execute(text("CREATE VIEW papers_text AS "
+                          "SELECT id, title, decompress_text(abstract) AS abstract, authors FROM papers"))
+    else:
+        conn.execute(text("DROP VIEW papers_text"))
+    if fts:
+        source, abstract = ("papers_text", "decompress_text({row}.abstract)") if compressed \
+            else ("papers", "{row}.abstract")
+        conn.execute(text("DROP TABLE papers_fts"))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE papers_fts USING fts5("
+            f"title, abstract, authors, content='{source}', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        _create_fts_triggers(conn, abstract)
+        conn.execute(text("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')"))
+
+
+def run_migrations(engine):
+    """Apply pending migrations, then sync_text_storage; returns the migration names applied"""
+    applied = []
+    with engine.connect() as conn:
+        done = {name for (name,) in conn.execute(SchemaMigration.__table__.select().with_only_columns(
+            SchemaMigration.name))}
+    for name, func in MIGRATIONS:
+        if name in done:
+            continue
+        try:
+            with engine.begin() as conn:
+                func(conn)
+                conn.execute(SchemaMigration.__table__.insert().values(name=name, applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # Another process (API vs CLI) recorded it first
+            continue
+        logger.info(f"Applied migration {name}")
+        applied.append(name)
+    with engine.begin() as conn:
+        sync_text_storage(conn)
+    return applied
@@ -1,27 +1,68 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, JSON, UniqueConstraint, Index, \
+    Boolean, false
+from sqlalchemy.orm import relationship, deferred, synonym
 from datetime import datetime
+from app.compression import CompressedText
+from app.config import settings
 from app.database import Base
 
 paper_categories = Table('paper_categories', Base.metadata,
-    Column('paper_id', Integer, ForeignKey('papers.id')),
-    Column('category_id', Integer, ForeignKey('categories.id'))
+    Column('paper_id', Integer, ForeignKey('papers.id'), primary_key=True),
+    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True),
+    # Papers in a category (filters, counts) without touching the table
+    Index('ix_paper_categories_category_paper', 'category_id', 'paper_id'),
 )
 
+paper_authors = Table('paper_authors', Base.metadata,
+    Column('paper_id', Integer, ForeignKey('papers.id'), primary_key=True),
+    Column('author_id', Integer, ForeignKey('authors.id'), primary_key=True),
+    Column('position', Integer),  # 0 for the first author
+    # Papers by an author without touching the table
+    Index('ix_paper_authors_author_paper', 'author_id', 'paper_id'),
+)
+
+class ProcessingState:
+    """Values of Paper.processing_state"""
+    PENDING = "pending"        # Waiting to be classified and summarized
+    PROCESSING = "processing"  # Claimed by a processing batch
+    DONE = "done"              # Summary and categories set
+    FAILED = "failed"          # Processing raised; not retried automatically
+
 class Paper(Base):
     __tablename__ = "papers"
+    __table_args__ = (
+        # Pending work in id order and counts per state, read from the index alone
+        Index("ix_papers_processing_state", "processing_state", "id"),
+        # Newest-first lists and their keyset cursors
+        Index("ix_papers_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     arxiv_id = Column(String, unique=True, index=True)
     title = Column(String)
     authors = Column(Text)
-    abstract = Column(Text)
-    summary = Column(Text)
+    # Compressed, and loaded on first access unless a query undefers group "text"
+    abstract = deferred(Column(CompressedText), group="text")
+    _summary = deferred(Column("summary", CompressedText), group="text")
+    summary_from_abstract = Column(Boolean, nullable=False, default=False, server_default=false())
     published_date = Column(DateTime)
     pdf_url = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    processing_state = Column(String, nullable=False, default=ProcessingState.PENDING,
+                              server_default=ProcessingState.PENDING)
+    processing_state_at = Column(DateTime, default=datetime.utcnow)  # When processing_state last changed
     
     categories = relationship("Category", secondary=paper_categories, back_populates="papers")
+    
+    def _get_summary(self):
+        return self.abstract if self.summary_from_abstract else self._summary
+    
+    def _set_summary(self, value):
+        # With SUMMARY_REFERENCES_ABSTRACT, a summary equal to the abstract is stored as a flag
+        self.summary_from_abstract = bool(value) and settings.SUMMARY_REFERENCES_ABSTRACT and value == self.abstract
+        self._summary = None if self.summary_from_abstract else value
+    
+    summary = synonym("_summary", descriptor=property(_get_summary, _set_summary))
 
 class Category(Base):
     __tablename__ = "categories"
@@ -32,12 +73,21 @@ class Category(Base):
     
     papers = relationship("Paper", secondary=paper_categories, back_populates="categories")
 
+class Author(Base):
+    """One spelling of an author's name, parsed from Paper.authors (see app/author_names.py)"""
+    __tablename__ = "authors"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String)  # As first seen: "Jane A Smith", "J. A. Smith"
+    normalized_name = Column(String, unique=True, index=True)  # "jane a smith", "j a smith"
+    lookup_key = Column(String, index=True)  # "smith j": last name and first initial
+
 class Report(Base):
     __tablename__ = "reports"
     
     id = Column(Integer, primary_key=True, index=True)
     report_type = Column(String)
-    content = Column(Text)
+    content = Column(CompressedText)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class JobHistory(Base):
@@ -51,3 +101,28 @@ class JobHistory(Base):
     status = Column(String)  # running, success, failed
     result = Column(JSON)  # Store job results
     error = Column(Text)  # Store error if failed
+
+class ScrapeCheckpoint(Base):
+    __tablename__ = "scrape_checkpoints"
+    __table_args__ = (UniqueConstraint("source", "query", name="uq_scrape_checkpoint_source_query"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, index=True)  # arxiv, biorxiv, pubmed
+    query = Column(String, default="")  # Query the high-water mark applies to
+    last_date = Column(DateTime)  # bioRxiv posting date, PubMed EDAT, arXiv submittedDate
+    cursor = Column(Integer, default=0)  # bioRxiv offset into the window starting at last_date
+    last_id = Column(String)  # Last DOI / PMID / arXiv id seen
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class StatsCounter(Base):
+    __tablename__ = "stats_counters"
+    
+    name = Column(String, primary_key=True)  # See app/repositories/stats_repository.py
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    
+    name = Column(String, primary_key=True)  # See app/migrations.py
+    applied_at = Column(DateTime, default=datetime.utcnow)
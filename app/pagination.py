@@ -0,0 +1,60 @@
+"""Opaque page cursors and cached totals for paginated paper lists
+
+A cursor is URL-safe base64 of a small JSON object. Lists ordered newest
+first use keyset cursors, {"c": created_at, "i": id} of the last paper
+on the page, so the next page is an index range scan on (created_at, id)
+however deep it is. Ranked search results have no stable key to seek
+from and use {"o": offset} instead. Callers treat both as opaque.
+"""
+import base64
+import json
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Tuple
+
+from app.config import settings
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if "o" in position:
+            return {"o": int(position["o"])}
+        return {"c": datetime.fromisoformat(position["c"]), "i": int(position["i"])}
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+def keyset_cursor(paper) -> str:
+    return encode_cursor({"c": paper.created_at.isoformat(), "i": paper.id})
+
+
+def offset_cursor(offset: int) -> str:
+    return encode_cursor({"o": offset})
+
+
+_totals: Dict[Hashable, Tuple[float, int]] = {}
+
+
+def cached_total(signature: Hashable, count: Callable[[], int]) -> int:
+    """count(), reused for PAPER_TOTAL_CACHE_SECONDS per filter signature
+
+    Totals are approximate by up to that many seconds of ingest, which is
+    what lets paging through a large filtered list skip the full COUNT on
+    every page.
+    """
+    now = time.monotonic()
+    hit = _totals.get(signature)
+    if hit and now - hit[0] < settings.PAPER_TOTAL_CACHE_SECONDS:
+        return hit[1]
+    if len(_totals) > 1000:
+        _totals.clear()
+    total = count()
+    _totals[signature] = (now, total)
+    return total
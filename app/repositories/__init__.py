@@ -1,4 +1,7 @@
 from .paper_repository import PaperRepository
 from .category_repository import CategoryRepository
+from .checkpoint_repository import CheckpointRepository
+from .stats_repository import StatsRepository
+from .author_repository import AuthorRepository
 
-__all__ = ['PaperRepository', 'CategoryRepository']
+__all__ = ['PaperRepository', 'CategoryRepository', 'CheckpointRepository', 'StatsRepository', 'AuthorRepository']
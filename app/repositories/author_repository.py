@@ -0,0 +1,130 @@
+from sqlalchemy import or_, select, false
+from sqlalchemy.orm import Session, Query
+from app.author_names import AuthorName, fold, make_name, parse_authors, source_of, split_first_last
+from app.models import Author, Paper, paper_authors
+from app.repositories.inserts import insert_ignoring_conflicts
+from typing import Iterable, List, Optional, Tuple
+
+LOOKUP_CHUNK_SIZE = 500  # Names per IN query when resolving author ids
+
+
+def _first_names_agree(query: str, normalized_name: str) -> bool:
+    """"jane" matches "jane a smith" and "j a smith" but not "john smith" """
+    author = normalized_name.split()[0]
+    return query == author or (len(query) == 1 or len(author) == 1) and query[0] == author[0]
+
+
+class AuthorRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def link_papers(self, papers: Iterable[Tuple[int, Optional[str], str]]) -> int:
+        """Create the authors and paper_authors rows for (paper_id, authors, source) triples
+    
+        `source` ("biorxiv", "pubmed", "arxiv") picks how `authors` is split.
+        Authors already stored are reused by normalized name; links that
+        exist are left alone. Returns the number of links written. Caller
+        commits.
+        """
+        parsed = [(paper_id, parse_authors(authors, source)) for paper_id, authors, source in papers]
+        names = {}
+        for _, authors in parsed:
+            for author in authors:
+                names.setdefault(author.normalized_name, author)
+        if not names:
+            return 0
+    
+        ids = self._ensure_authors(list(names.values()))
+        links = [{"paper_id": paper_id, "author_id": ids[author.normalized_name], "position": position}
+                 for paper_id, authors in parsed for position, author in enumerate(authors)]
+        self.db.execute(insert_ignoring_conflicts(self.db, paper_authors), links)
+        return len(links)
+    
+    def _ensure_authors(self, names: List[AuthorName]) -> dict:
+        """normalized_name -> author id, inserting the names not stored yet"""
+        table = Author.__table__
+        insert_stmt = insert_ignoring_conflicts(self.db, table)
+        returning = self.db.get_bind().dialect.insert_executemany_returning
+        if returning:
+            insert_stmt = insert_stmt.returning(table.c.normalized_name, table.c.id)
+        ids = {}
+        for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+            ids.update(self._author_ids([name.normalized_name for name in chunk]))
+            missing = [{"name": name.name, "normalized_name": name.normalized_name, "lookup_key": name.lookup_key}
+                       for name in chunk if name.normalized_name not in ids]
+            if not missing:
+                continue
+            result = self.db.execute(insert_stmt, missing)
+            if returning:
+                ids.update(result.all())
+            # Names another writer added in between were not inserted
+            unresolved = [row["normalized_name"] for row in missing if row["normalized_name"] not in ids]
+            if unresolved:
+                ids.update(self._author_ids(unresolved))
+        return ids
+    
+    def _author_ids(self, normalized_names: List[str]) -> dict:
+        return dict(self.db.execute(select(Author.normalized_name, Author.id).where(
+            Author.normalized_name.in_(normalized_names))).all())
+    
+    def find(self, name: str) -> List[Author]:
+        """Authors a typed name can refer to, from the lookup_key index
+    
+        "Jane Smith" and "Smith, J." match every spelling with last name
+        Smith and first initial J whose first name does not contradict the
+        query (so "J. A. Smith" but not "John Smith"); a bare "Smith", or
+        "van der Berg", matches everyone with that last name.
+        """
+        surname, comma, given = name.partition(",")
+        if not comma:
+            given, surname = split_first_last(name)
+        parsed = make_name(given, surname)
+        if not parsed:
+            return []
+        first = fold(given).split()[0] if fold(given) else None
+        conditions = []
+        if first:
+            conditions.append(Author.lookup_key == parsed.lookup_key)
+        if not comma or not first:
+            # The whole query as a last name: keys "smith" and "smith <initial>"
+            last = fold(name if not comma else surname)
+            conditions += [Author.lookup_key == last, Author.lookup_key.between(f"{last} ", f"{last} ~")]
+    
+        authors = self.db.query(Author).filter(or_(*conditions)).order_by(Author.id).all()
+        return [author for author in authors
+                if not first or author.lookup_key != parsed.lookup_key
+                or _first_names_agree(first, author.normalized_name)]
+    
+    def filter_papers(self, query: Query, name: str) -> Query:
+        """Restrict a Paper query to papers by any author matching `name` (see find)"""
+        return self.in_any_author(query, [author.id for author in self.find(name)])
+    
+    def in_any_author(self, query: Query, author_ids: List[int]) -> Query:
+        """Restrict a Paper query to papers by at least one of `author_ids`"""
+        if not author_ids:
+            return query.filter(false())
+        return query.filter(Paper.id.in_(
+            select(paper_authors.c.paper_id).where(paper_authors.c.author_id.in_(author_ids))
+        ))
+    
+    def unlink_paper(self, paper_id: int):
+        """Remove a paper's author links (caller commits)"""
+        self.db.execute(paper_authors.delete().where(paper_authors.c.paper_id == paper_id))
+    
+    def backfill(self, batch_size: int = 1000, after_id: int = 0) -> Tuple[int, int]:
+        """Link one batch of papers, with id > after_id, that have no author links yet
+    
+        Returns (last paper id seen, links written); a last id of
+        `after_id` means nothing was left. Commits the batch.
+        """
+        unlinked = ~select(paper_authors.c.paper_id).where(paper_authors.c.paper_id == Paper.id).exists()
+        rows = self.db.query(Paper.id, Paper.arxiv_id, Paper.authors).filter(
+            Paper.id > after_id, unlinked
+        ).order_by(Paper.id).limit(batch_size).all()
+        if not rows:
+            return after_id, 0
+        links = self.link_papers((paper_id, authors, source_of(arxiv_id or ""))
+                                 for paper_id, arxiv_id, authors in rows)
+        self.db.commit()
+        return rows[-1][0], links
@@ -1,6 +1,13 @@
+import time
+import weakref
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from app.models import Category
-from typing import List, Optional
+from app.models import Category, paper_categories
+from app.config import settings
+from app.repositories.stats_repository import StatsRepository, CATEGORIES
+from typing import Dict, List, Optional, Tuple
+
+_name_maps = weakref.WeakKeyDictionary()  # engine -> (loaded at, {name: id})
 
 class CategoryRepository:
     def __init__(self, db: Session):
@@ -18,6 +25,49 @@ class CategoryRepository:
         """Get all categories"""
         return self.db.query(Category).all()
     
+    def name_to_id(self, refresh: bool = False) -> Dict[str, int]:
+        """Map of every category name to its id, cached for CATEGORY_CACHE_SECONDS
+        
+        There are a few dozen categories, so filters resolve names here
+        instead of joining categories and matching names in SQL.
+        """
+        bind = self.db.get_bind()
+        cached = _name_maps.get(bind)
+        if refresh or not cached or time.monotonic() - cached[0] > settings.CATEGORY_CACHE_SECONDS:
+            cached = (time.monotonic(), {name: id for id, name in self.db.query(Category.id, Category.name)})
+            _name_maps[bind] = cached
+        return cached[1]
+    
+    def resolve(self, name: str, exact: bool = False) -> List[int]:
+        """Ids of the categories `name` selects: an exact name, or (default) a case-insensitive substring
+        
+        Nothing matching in the cache triggers one reload, in case another
+        process has just created the category.
+        """
+        for refresh in (False, True):
+            names = self.name_to_id(refresh)
+            if exact:
+                ids = [names[name]] if name in names else []
+            else:
+                ids = [id for category, id in names.items() if name.lower() in category.lower()]
+            if ids:
+                return ids
+        return []
+    
+    def get_all_with_counts(self) -> List[Tuple[Category, int]]:
+        """All categories with their paper counts, from one GROUP BY over paper_categories
+        
+        No Paper rows are loaded: the counts are read from the
+        (category_id, paper_id) index alone.
+        """
+        counts = self.db.query(
+            paper_categories.c.category_id,
+            func.count().label("paper_count")
+        ).group_by(paper_categories.c.category_id).subquery()
+        return self.db.query(Category, func.coalesce(counts.c.paper_count, 0)).outerjoin(
+            counts, counts.c.category_id == Category.id
+        ).order_by(Category.id).all()
+    
     def count_all(self) -> int:
         """Count all categories"""
         return self.db.query(Category).count()
@@ -26,7 +76,9 @@ class CategoryRepository:
         """Create new category"""
         category = Category(name=name, description=description)
         self.db.add(category)
+        StatsRepository(self.db).add({CATEGORIES: 1})
         self.db.commit()
+        _name_maps.pop(self.db.get_bind(), None)
         self.db.refresh(category)
         return category
     
@@ -47,7 +99,9 @@ class CategoryRepository:
         """Delete category"""
         category = self.get_by_id(category_id)
         if category:
+            StatsRepository(self.db).add({CATEGORIES: -1})
             self.db.delete(category)
             self.db.commit()
+            _name_maps.pop(self.db.get_bind(), None)
             return True
         return False
@@ -0,0 +1,39 @@
+from sqlalchemy.orm import Session
+from app.models import ScrapeCheckpoint
+from typing import Optional
+from datetime import datetime
+
+class CheckpointRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get(self, source: str, query: str = "") -> Optional[ScrapeCheckpoint]:
+        """Get the high-water mark for a source and query"""
+        return self.db.query(ScrapeCheckpoint).filter(
+            ScrapeCheckpoint.source == source,
+            ScrapeCheckpoint.query == query
+        ).first()
+    
+    def save(self, source: str, query: str = "", last_date: datetime = None,
+             cursor: int = 0, last_id: str = None) -> ScrapeCheckpoint:
+        """Create or move the high-water mark for a source and query"""
+        checkpoint = self.get(source, query)
+        if not checkpoint:
+            checkpoint = ScrapeCheckpoint(source=source, query=query)
+            self.db.add(checkpoint)
+        checkpoint.last_date = last_date
+        checkpoint.cursor = cursor
+        checkpoint.last_id = last_id
+        checkpoint.updated_at = datetime.utcnow()
+        self.db.commit()
+        self.db.refresh(checkpoint)
+        return checkpoint
+    
+    def delete(self, source: str, query: str = "") -> bool:
+        """Forget the high-water mark so the next run fetches everything"""
+        checkpoint = self.get(source, query)
+        if checkpoint:
+            self.db.delete(checkpoint)
+            self.db.commit()
+            return True
+        return False
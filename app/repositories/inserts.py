@@ -0,0 +1,23 @@
+"""Dialect-specific INSERT statements shared by the repositories"""
+from typing import Optional
+
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+
+def upsert_insert(db: Session, table: Table) -> Optional[Insert]:
+    """INSERT into `table` supporting ON CONFLICT (SQLite, PostgreSQL); None on other engines"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    return None
+
+
+def insert_ignoring_conflicts(db: Session, table: Table) -> Insert:
+    """INSERT into `table` that skips rows conflicting with a unique key (plain INSERT elsewhere)"""
+    stmt = upsert_insert(db, table)
+    return stmt.on_conflict_do_nothing() if stmt is not None else insert(table)
@@ -1,7 +1,97 @@
-from sqlalchemy.orm import Session, aliased
-from app.models import Paper, Category
-from typing import List, Optional
-from datetime import datetime
+import html
+import re
+import weakref
+from sqlalchemy import update, inspect, func, or_, column, literal_column, table, tuple_, select, false, Text, type_coerce
+from sqlalchemy.orm import Session, Query
+from sqlalchemy.types import TypeDecorator
+from app.models import Paper, ProcessingState, paper_categories
+from app.config import settings
+from app.author_names import source_of
+from app.compression import readable
+from app.pagination import keyset_cursor, offset_cursor
+from app.repositories.author_repository import AuthorRepository
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.inserts import insert_ignoring_conflicts
+from app.repositories.stats_repository import StatsRepository, PAPERS, state_counter, added_counter
+from typing import Callable, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
+
+# SQLite: FTS5 index over title, abstract and authors (created by migration 0002)
+papers_fts = table("papers_fts", column("rowid"), column("papers_fts"))
+FTS_WEIGHTS = (10.0, 1.0, 2.0)  # bm25 weight per column: title matches count most
+SNIPPET_TOKENS = 24
+SNIPPET_START, SNIPPET_STOP = "\x02", "\x03"  # Highlight bounds in SQL, replaced by the caller's markers
+
+# PostgreSQL: papers.search_vector, a generated tsvector with a GIN index (migration 0003)
+PG_SEARCH_CONFIG = "english"
+search_vector = literal_column("papers.search_vector")
+
+_search_backends = weakref.WeakKeyDictionary()  # engine -> search_backend()
+
+
+class Snippet(TypeDecorator):
+    """A snippet read with escaped text and only the highlight markers left as markup"""
+    impl = Text
+    cache_ok = True
+    
+    def __init__(self, markers: Tuple[str, str], escape: Callable[[str], str]):
+        super().__init__()
+        self.markers = markers
+        self.escape = escape
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        value = self.escape(value)
+        return value.replace(SNIPPET_START, self.markers[0]).replace(SNIPPET_STOP, self.markers[1])
+
+_TERM = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def search_terms(text: str) -> List[Tuple[str, bool]]:
+    """Split a search string into (term, is_prefix) pairs
+    
+    "quoted text" is a phrase, a trailing * makes a prefix query
+    (`transcript*`, `"single cell"*`); every term must match.
+    """
+    terms = []
+    for phrase, phrase_star, word in _TERM.findall(text):
+        term, prefix = (phrase, bool(phrase_star)) if not word else (word.rstrip("*"), word.endswith("*"))
+        term = term.replace('"', " ").strip()
+        if term:
+            terms.append((term, prefix))
+    return terms
+
+
+def fts_match_expression(text: str) -> Optional[str]:
+    """FTS5 MATCH expression for a search string, with every term quoted
+    
+    Quoting keeps user input from being read as FTS5 syntax (AND, NEAR,
+    column filters, stray parentheses); the tokenizer still splits a
+    quoted term, so `CRISPR-Cas9` becomes the phrase "crispr cas9".
+    """
+    terms = search_terms(text)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' + ("*" if prefix else "") for term, prefix in terms)
+
+
+def pg_tsquery_expression(text: str) -> Optional[str]:
+    """to_tsquery() input for a search string: terms ANDed, phrases as <->, prefixes as :*
+    
+    Only word characters are passed through, so operators and quotes in
+    user input cannot make the expression invalid.
+    """
+    parts = []
+    for term, prefix in search_terms(text):
+        words = re.findall(r"\w+", term)
+        if not words:
+            continue
+        if prefix:
+            words[-1] += ":*"
+        parts.append(words[0] if len(words) == 1 else "(" + " <-> ".join(words) + ")")
+    return " & ".join(parts) or None
+
 
 class PaperRepository:
     def __init__(self, db: Session):
@@ -20,26 +110,164 @@ class PaperRepository:
         return self.db.query(Paper).order_by(Paper.created_at.desc()).limit(limit).offset(offset).all()
     
     def get_unprocessed(self, limit: int = 10) -> List[Paper]:
-        """Get unprocessed papers (no summary)"""
+        """Get papers waiting to be processed"""
         return self.db.query(Paper).filter(
-            (Paper.summary == None) | (Paper.summary == "")
-        ).limit(limit).all()
+            Paper.processing_state == ProcessingState.PENDING
+        ).order_by(Paper.id).limit(limit).all()
     
-    def search(self, query: str, limit: int = 20) -> List[Paper]:
-        """Search papers by title or abstract"""
-        return self.db.query(Paper).filter(
-            (Paper.title.ilike(f"%{query}%")) | (Paper.abstract.ilike(f"%{query}%"))
-        ).limit(limit).all()
+    def claim_pending(self, limit: int = 10) -> List[int]:
+        """Mark up to `limit` pending papers as processing and return the ids this call claimed
+        
+        Claims left behind by a crashed run are released first, once older
+        than PROCESSING_STALE_MINUTES.
+        """
+        now = datetime.utcnow()
+        stale = now - timedelta(minutes=settings.PROCESSING_STALE_MINUTES)
+        released = self.db.query(Paper).filter(
+            Paper.processing_state == ProcessingState.PROCESSING,
+            Paper.processing_state_at < stale
+        ).update({Paper.processing_state: ProcessingState.PENDING, Paper.processing_state_at: now},
+                 synchronize_session=False)
+        
+        # On PostgreSQL, rows locked by another worker's claim are skipped
+        ids = [paper_id for (paper_id,) in self.db.query(Paper.id).filter(
+            Paper.processing_state == ProcessingState.PENDING
+        ).order_by(Paper.id).limit(limit).with_for_update(skip_locked=True)]
+        if ids:
+            # Only rows still pending; a concurrent batch may have taken some
+            claim = update(Paper).where(
+                Paper.id.in_(ids), Paper.processing_state == ProcessingState.PENDING
+            ).values(processing_state=ProcessingState.PROCESSING, processing_state_at=now)
+            options = {"synchronize_session": False}
+            if self.db.get_bind().dialect.update_returning:
+                ids = sorted(self.db.scalars(claim.returning(Paper.id), execution_options=options))
+            else:
+                self.db.execute(claim, execution_options=options)
+                ids = [paper_id for (paper_id,) in self.db.query(Paper.id).filter(
+                    Paper.id.in_(ids), Paper.processing_state == ProcessingState.PROCESSING,
+                    Paper.processing_state_at == now
+                ).order_by(Paper.id)]
+        claimed = len(ids)
+        StatsRepository(self.db).add({
+            state_counter(ProcessingState.PENDING): released - claimed,
+            state_counter(ProcessingState.PROCESSING): claimed - released,
+        })
+        self.db.commit()
+        return ids
+    
+    def set_state(self, paper: Paper, state: str):
+        """Move a paper to a processing state (caller commits)"""
+        if paper.processing_state != state:
+            StatsRepository(self.db).add({state_counter(paper.processing_state): -1, state_counter(state): 1})
+        paper.processing_state = state
+        paper.processing_state_at = datetime.utcnow()
+    
+    def paginate(self, query: Query, limit: int, cursor: Optional[dict] = None, offset: int = 0,
+                 ranked: bool = False) -> Tuple[list, Optional[str]]:
+        """One page of a Paper query and the cursor for the next page (None on the last)
+        
+        Unranked queries are listed newest first and continue from a keyset
+        cursor (see app/pagination.py), which the (created_at, id) index
+        serves directly; `offset` still works for the first page requested.
+        Ranked queries (apply_search) keep their order and page by offset.
+        """
+        if cursor and "o" in cursor:
+            offset = cursor["o"]
+        elif cursor:
+            if ranked:
+                raise ValueError("Cursor does not belong to a ranked search")
+            query = query.filter(tuple_(Paper.created_at, Paper.id) < (cursor["c"], cursor["i"]))
+            offset = 0
+        if not ranked:
+            query = query.order_by(Paper.created_at.desc(), Paper.id.desc())
+        
+        rows = query.offset(offset).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        if ranked:
+            return rows, offset_cursor(offset + limit)
+        return rows, keyset_cursor(rows[-1])
+    
+    def search_backend(self) -> str:
+        """Index behind apply_search(): "fts5" (SQLite), "tsvector" (PostgreSQL) or "like" (none)"""
+        bind = self.db.get_bind()
+        if bind not in _search_backends:
+            inspector = inspect(bind)
+            backend = "like"
+            if bind.dialect.name == "sqlite" and "papers_fts" in inspector.get_table_names():
+                backend = "fts5"
+            elif bind.dialect.name == "postgresql" and \
+                    "search_vector" in {c["name"] for c in inspector.get_columns("papers")}:
+                backend = "tsvector"
+            _search_backends[bind] = backend
+        return _search_backends[bind]
+    
+    def apply_search(self, query: Query, text: str, markers: Tuple[str, str] = ("<mark>", "</mark>"),
+                     escape: Callable[[str], str] = html.escape) -> Query:
+        """Restrict a Paper query to matches for `text`, best match first
+        
+        With a full-text index, results are ordered by relevance (BM25 on
+        SQLite, ts_rank_cd on PostgreSQL) and each row gets a `snippet`
+        column: a matching fragment, passed through `escape` (HTML by
+        default), with matched terms wrapped in `markers`. Without one,
+        every term is matched with ILIKE against title and abstract,
+        newest first, and `snippet` is NULL.
+        """
+        backend = self.search_backend()
+        snippet_type = Snippet(markers, escape)
+        if backend == "fts5" and fts_match_expression(text):
+            rank = func.bm25(literal_column("papers_fts"), *FTS_WEIGHTS)
+            snippet = func.snippet(literal_column("papers_fts"), -1, SNIPPET_START, SNIPPET_STOP, "…", SNIPPET_TOKENS)
+            return query.join(papers_fts, papers_fts.c.rowid == Paper.id).filter(
+                papers_fts.c.papers_fts.match(fts_match_expression(text))
+            ).add_columns(type_coerce(snippet, snippet_type).label("snippet")).order_by(rank, Paper.id.desc())
+        if backend == "tsvector" and pg_tsquery_expression(text):
+            tsquery = func.to_tsquery(PG_SEARCH_CONFIG, pg_tsquery_expression(text))
+            options = (f'StartSel="{SNIPPET_START}", StopSel="{SNIPPET_STOP}", '
+                       f'MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}')
+            snippet = func.ts_headline(PG_SEARCH_CONFIG, Paper.abstract, tsquery, options)
+            return query.filter(search_vector.op("@@")(tsquery)).add_columns(
+                type_coerce(snippet, snippet_type).label("snippet")
+            ).order_by(func.ts_rank_cd(search_vector, tsquery).desc(), Paper.id.desc())
+        
+        abstract = readable(Paper.abstract, self.db.get_bind().dialect.name)
+        for term, _ in search_terms(text):
+            query = query.filter(or_(Paper.title.ilike(f"%{term}%"), abstract.ilike(f"%{term}%")))
+        return query.add_columns(
+            literal_column("NULL").label("snippet")
+        ).order_by(Paper.created_at.desc(), Paper.id.desc())
+    
+    def search(self, query: str, limit: int = 20, offset: int = 0,
+               markers: Tuple[str, str] = ("<mark>", "</mark>"),
+               escape: Callable[[str], str] = html.escape) -> List[Tuple[Paper, Optional[str]]]:
+        """Search papers (see apply_search); returns (paper, snippet) pairs, best match first"""
+        return self.apply_search(self.db.query(Paper), query, markers, escape).offset(offset).limit(limit).all()
+    
+    def filter_categories(self, query: Query, category_names: List[str], exact: bool = False) -> Query:
+        """Restrict a Paper query to papers in every one of `category_names` (AND logic)
+        
+        Each name is resolved to category ids from the cached name map
+        (a case-insensitive substring unless `exact`), so each condition
+        is an IN over the (category_id, paper_id) index, read without
+        touching categories or joining per name.
+        """
+        resolver = CategoryRepository(self.db)
+        for name in category_names:
+            query = self.in_any_category(query, resolver.resolve(name, exact))
+        return query
+    
+    def in_any_category(self, query: Query, category_ids: List[int]) -> Query:
+        """Restrict a Paper query to papers in at least one of `category_ids` (OR logic)"""
+        if not category_ids:
+            return query.filter(false())
+        return query.filter(Paper.id.in_(
+            select(paper_categories.c.paper_id).where(paper_categories.c.category_id.in_(category_ids))
+        ))
     
     def filter_by_categories(self, category_names: List[str], limit: int = 100) -> List[Paper]:
         """Filter papers by categories (AND logic)"""
-        query = self.db.query(Paper)
-        for cat_name in category_names:
-            cat_alias = aliased(Category)
-            query = query.join(cat_alias, Paper.categories).filter(
-                cat_alias.name.ilike(f"%{cat_name}%")
-            )
-        return query.distinct().limit(limit).all()
+        return self.filter_categories(self.db.query(Paper), category_names).limit(limit).all()
     
     def filter_by_date_range(self, start_date: datetime, end_date: datetime, 
                             category_names: List[str] = None) -> List[Paper]:
@@ -47,17 +275,11 @@ class PaperRepository:
         query = self.db.query(Paper).filter(
             Paper.published_date >= start_date,
             Paper.published_date <= end_date,
-            Paper.summary != None,
-            Paper.summary != ""
+            Paper.processing_state == ProcessingState.DONE
         )
         
         if category_names:
-            for cat_name in category_names:
-                cat_alias = aliased(Category)
-                query = query.join(cat_alias, Paper.categories).filter(
-                    cat_alias.name.ilike(f"%{cat_name}%")
-                )
-            query = query.distinct()
+            query = self.filter_categories(query, category_names)
         
         return query.all()
     
@@ -67,23 +289,85 @@ class PaperRepository:
     
     def count_processed(self) -> int:
         """Count processed papers"""
-        return self.db.query(Paper).filter(
-            Paper.summary != None, Paper.summary != ""
-        ).count()
+        return self.db.query(Paper).filter(Paper.processing_state == ProcessingState.DONE).count()
+    
+    def count_by_state(self) -> Dict[str, int]:
+        """Paper counts per processing state, from one pass over the state index"""
+        counts = {state: 0 for state in (ProcessingState.PENDING, ProcessingState.PROCESSING,
+                                         ProcessingState.DONE, ProcessingState.FAILED)}
+        for state, count in self.db.query(Paper.processing_state, func.count()).group_by(Paper.processing_state):
+            counts[state] = count
+        return counts
     
     def count_recent(self, days: int = 7) -> int:
         """Count papers added in last N days"""
-        from datetime import timedelta
         cutoff = datetime.now() - timedelta(days=days)
         return self.db.query(Paper).filter(Paper.created_at >= cutoff).count()
     
     def create(self, paper: Paper) -> Paper:
         """Create new paper"""
         self.db.add(paper)
+        self.db.flush()
+        AuthorRepository(self.db).link_papers([(paper.id, paper.authors, source_of(paper.arxiv_id or ""))])
+        self.record_added(1)
         self.db.commit()
         self.db.refresh(paper)
         return paper
     
+    def insert_new(self, rows: List[Dict[str, Any]], chunk_size: Optional[int] = None,
+                   source: Optional[str] = None) -> int:
+        """Insert papers whose arxiv_id is not stored yet; returns how many were inserted
+        
+        Per chunk: one IN query for the identifiers already present, one
+        multi-row INSERT ... ON CONFLICT DO NOTHING for the rest (which also
+        covers rows another writer inserted in between), the author rows and
+        links for the inserted papers, one commit. The statement is executed
+        with a list of parameter sets, which SQLAlchemy renders as batched
+        multi-row VALUES and compiles once; RETURNING makes the count exact
+        and gives the new ids. `source` says how the authors strings are
+        formatted; by default it is read from each arxiv_id (see source_of).
+        """
+        chunk_size = chunk_size or settings.DB_INSERT_CHUNK_SIZE
+        stmt = insert_ignoring_conflicts(self.db, Paper.__table__)
+        if self.db.get_bind().dialect.insert_executemany_returning:
+            stmt = stmt.returning(Paper.id, Paper.arxiv_id)
+        inserted = 0
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            ids = {row["arxiv_id"] for row in chunk}
+            existing = {arxiv_id for (arxiv_id,) in
+                        self.db.query(Paper.arxiv_id).filter(Paper.arxiv_id.in_(ids))}
+            new_rows = {}
+            for row in chunk:
+                if row["arxiv_id"] not in existing:
+                    new_rows.setdefault(row["arxiv_id"], row)
+            if not new_rows:
+                continue
+            
+            result = self.db.execute(stmt, list(new_rows.values()))
+            if result.returns_rows:
+                inserted_ids = result.all()
+                count = len(inserted_ids)
+            else:
+                count = result.rowcount
+                inserted_ids = self.db.query(Paper.id, Paper.arxiv_id).filter(Paper.arxiv_id.in_(new_rows))
+            AuthorRepository(self.db).link_papers(
+                (paper_id, new_rows[arxiv_id]["authors"], source or source_of(arxiv_id))
+                for paper_id, arxiv_id in inserted_ids
+            )
+            self.record_added(count)
+            inserted += count
+            self.db.commit()
+        return inserted
+    
+    def record_added(self, count: int):
+        """Count `count` new pending papers in the stats counters (caller commits)"""
+        StatsRepository(self.db).add({
+            PAPERS: count,
+            state_counter(ProcessingState.PENDING): count,
+            added_counter(datetime.utcnow().date()): count,
+        })
+    
     def update(self, paper: Paper) -> Paper:
         """Update paper"""
         self.db.commit()
@@ -94,6 +378,11 @@ class PaperRepository:
         """Delete paper"""
         paper = self.get_by_id(paper_id)
         if paper:
+            deltas = {PAPERS: -1, state_counter(paper.processing_state): -1}
+            if paper.created_at:
+                deltas[added_counter(paper.created_at.date())] = -1
+            StatsRepository(self.db).add(deltas)
+            AuthorRepository(self.db).unlink_paper(paper_id)
             self.db.delete(paper)
             self.db.commit()
             return True
@@ -0,0 +1,81 @@
+from sqlalchemy import false, text, update
+from sqlalchemy.orm import Session
+from app.models import StatsCounter
+from app.repositories.inserts import upsert_insert
+from typing import Dict
+from datetime import date, datetime
+
+# Counter names in stats_counters
+PAPERS = "papers"
+CATEGORIES = "categories"
+
+
+def state_counter(state: str) -> str:
+    """Papers in a processing state"""
+    return f"state:{state}"
+
+
+def added_counter(day: date) -> str:
+    """Papers added on a (UTC) day"""
+    return f"added:{day.isoformat()}"
+
+
+class StatsRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def add(self, deltas: Dict[str, int]):
+        """Add deltas to counters, creating missing ones (caller commits)
+        
+        Runs in the caller's transaction, so a counter moves if and only if
+        the change it counts is committed.
+        """
+        rows = [{"name": name, "value": delta, "updated_at": datetime.utcnow()}
+                for name, delta in deltas.items() if delta]
+        if not rows:
+            return
+        table = StatsCounter.__table__
+        stmt = upsert_insert(self.db, table)
+        if stmt is not None:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.name],
+                set_={"value": table.c.value + stmt.excluded.value, "updated_at": stmt.excluded.updated_at}
+            )
+            self.db.execute(stmt, rows)
+            return
+        for row in rows:
+            counter = self.db.get(StatsCounter, row["name"])
+            if counter:
+                counter.value += row["value"]
+                counter.updated_at = row["updated_at"]
+            else:
+                self.db.add(StatsCounter(**row))
+        self.db.flush()
+    
+    def get_all(self) -> Dict[str, int]:
+        """Every counter by name"""
+        return {name: value for name, value in self.db.query(StatsCounter.name, StatsCounter.value)}
+    
+    def lock(self):
+        """Hold off other counter updates until the caller commits
+        
+        Take it before reading the tables a recount is computed from: the
+        reads then see every change whose counter update committed first,
+        and changes that commit later add to the recounted values instead
+        of being overwritten. PostgreSQL locks stats_counters against
+        writes (reads go on); SQLite takes the database write lock with an
+        UPDATE that matches no rows.
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            self.db.execute(text("LOCK TABLE stats_counters IN EXCLUSIVE MODE"))
+        else:
+            table = StatsCounter.__table__
+            self.db.execute(update(table).where(false()).values(value=table.c.value))
+    
+    def replace(self, values: Dict[str, int]):
+        """Overwrite all counters with `values` (caller commits; see lock)"""
+        self.db.query(StatsCounter).delete(synchronize_session=False)
+        now = datetime.utcnow()
+        self.db.add_all([StatsCounter(name=name, value=value, updated_at=now) for name, value in values.items()])
+        self.db.flush()
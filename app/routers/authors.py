@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.orm import Session, selectinload, undefer_group
+from app.database import get_db
+from app.models import Paper
+from app.pagination import cached_total, decode_cursor
+from app.repositories import AuthorRepository, PaperRepository
+from app.routers.papers import _serialize
+from typing import Optional
+
+router = APIRouter()
+
+
+@router.get("/{name}/papers")
+def author_papers(
+    name: str,
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+):
+    """Papers by an author, newest first, paginated like /papers.
+
+    `name` is "Jane Smith", "Smith, J." or a last name alone; `authors`
+    lists every stored spelling it matched.
+    """
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    repo = AuthorRepository(db)
+    authors = repo.find(name)
+    if not authors:
+        raise HTTPException(status_code=404, detail="Author not found")
+    q = db.query(Paper).options(selectinload(Paper.categories), undefer_group("text"))
+    q = repo.in_any_author(q, [a.id for a in authors])
+    total = cached_total(("author", name), q.count) if include_total else None
+    try:
+        rows, next_cursor = PaperRepository(db).paginate(q, limit, cursor=position)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "authors": [{"id": a.id, "name": a.name} for a in authors],
+        "total": total,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "papers": [_serialize(p) for p in rows],
+    }
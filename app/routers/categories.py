@@ -1,19 +1,19 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import Category
+from app.repositories import CategoryRepository
 
 router = APIRouter()
 
 @router.get("/")
 def list_categories(db: Session = Depends(get_db)):
-    categories = db.query(Category).all()
+    categories = CategoryRepository(db).get_all_with_counts()
     return [
         {
             "id": c.id,
             "name": c.name,
             "description": c.description,
-            "paper_count": len(c.papers)
+            "paper_count": paper_count
         }
-        for c in categories
+        for c, paper_count in categories
     ]
@@ -2,6 +2,7 @@ from fastapi import APIRouter, BackgroundTasks, Depends
 from app.services.processing import process_papers_batch
 from app.agents.biorxiv_scraper import BiorxivScraper
 from app.agents.pubmed_scraper import PubmedScraper
+from app.agents.scraper import ArxivScraper
 from app.database import get_db
 from sqlalchemy.orm import Session
 import asyncio
@@ -10,20 +11,23 @@ router = APIRouter(prefix="/jobs", tags=["jobs"])
 
 @router.post("/scrape")
 async def trigger_scrape(source: str = "biorxiv", max_results: int = 10, query: str = None, days_back: int = 30, db: Session = Depends(get_db)):
-    """Manually trigger scraping from biorxiv or pubmed"""
+    """Manually trigger scraping from biorxiv, pubmed or arxiv (query: comma-separated categories)"""
     if source == "biorxiv":
         from app.config import settings
         biorxiv_query = query or settings.BIORXIV_SCRAPE_QUERY or None
         scraper = BiorxivScraper()
-        papers = await scraper.fetch_recent_papers(max_results, days_back=days_back, query=biorxiv_query)
+        result = await scraper.ingest(db, max_results, days_back=days_back, query=biorxiv_query)
     elif source == "pubmed":
         scraper = PubmedScraper()
-        papers = await scraper.fetch_recent_papers(max_results, query or "longread")
+        result = await scraper.ingest(db, max_results, query or "longread")
+    elif source == "arxiv":
+        scraper = ArxivScraper()
+        categories = query.split(",") if query else None
+        result = await scraper.ingest(db, max_results, categories=categories, days_back=days_back)
     else:
-        return {"error": f"Unknown source: {source}. Use 'biorxiv' or 'pubmed'"}
+        return {"error": f"Unknown source: {source}. Use 'biorxiv', 'pubmed' or 'arxiv'"}
 
-    saved_count = scraper.save_papers(db, papers)
-    return {"status": "completed", "source": source, "papers_fetched": len(papers), "papers_saved": saved_count}
+    return {"status": "completed", "source": source, "papers_fetched": result["fetched"], "papers_saved": result["saved"]}
 
 @router.post("/process")
 async def trigger_process(background_tasks: BackgroundTasks, limit: int = 10):
@@ -41,17 +45,13 @@ async def trigger_process_sync(limit: int = 10):
 async def job_status():
     """Get processing status"""
     from app.database import SessionLocal
-    from app.models import Paper
+    from app.services.stats import get_stats
 
     db = SessionLocal()
     try:
-        total = db.query(Paper).count()
-        processed = db.query(Paper).filter(Paper.summary != None, Paper.summary != "").count()
-        return {
-            "total_papers": total,
-            "processed": processed,
-            "unprocessed": total - processed,
-        }
+        stats = get_stats(db)
+        return {key: stats[key] for key in
+                ("total_papers", "processed", "unprocessed", "pending", "processing", "failed")}
     finally:
         db.close()
 
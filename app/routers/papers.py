@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, undefer_group
 from app.database import get_db
-from app.models import Paper, Category
+from app.models import Paper
+from app.pagination import cached_total, decode_cursor
+from app.repositories.author_repository import AuthorRepository
+from app.repositories.paper_repository import PaperRepository
 from typing import Optional
 
 router = APIRouter()
@@ -27,31 +30,64 @@ def list_papers(
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     search: Optional[str] = None,
     category: Optional[str] = None,
+    author: Optional[str] = None,
 ):
-    """List papers with optional search and category filter, paginated."""
-    q = db.query(Paper)
-    if search:
-        q = q.filter(
-            Paper.title.ilike(f"%{search}%") | Paper.abstract.ilike(f"%{search}%")
-        )
+    """List papers with optional search, category and author filters, paginated.
+
+    Pass the returned `next_cursor` as `cursor` to get the next page
+    (null on the last page); `offset` still works. `total` is cached per
+    filter for PAPER_TOTAL_CACHE_SECONDS, and skipped with
+    include_total=false.
+
+    `search` takes words, "quoted phrases" and prefix* terms; matches are
+    ranked best first and carry a `snippet`: HTML-escaped text with
+    <mark>-highlighted terms.
+    `author` takes "Jane Smith", "Smith, J." or a last name alone.
+    """
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    repo = PaperRepository(db)
+    # Categories for the whole page in one extra query, not one per paper; abstract and summary in the main one
+    q = db.query(Paper).options(selectinload(Paper.categories), undefer_group("text"))
     if category:
-        q = q.join(Paper.categories).filter(Category.name == category)
-    total = q.count()
-    papers = q.order_by(Paper.created_at.desc()).offset(offset).limit(limit).all()
+        q = repo.filter_categories(q, [category], exact=True)
+    if author:
+        q = AuthorRepository(db).filter_papers(q, author)
+    if search:
+        q = repo.apply_search(q, search)
+    total = None
+    if include_total:
+        # Counting needs no ranking
+        total = cached_total(("papers", search, category, author), q.order_by(None).count)
+
+    try:
+        rows, next_cursor = repo.paginate(q, limit, cursor=position, offset=offset, ranked=bool(search))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if search:
+        papers = [dict(_serialize(p), snippet=snippet) for p, snippet in rows]
+    else:
+        papers = [_serialize(p) for p in rows]
     return {
         "total": total,
         "offset": offset,
         "limit": limit,
-        "papers": [_serialize(p) for p in papers],
+        "next_cursor": next_cursor,
+        "papers": papers,
     }
 
 
 @router.get("/{paper_id}")
 def get_paper(paper_id: int, db: Session = Depends(get_db)):
     """Get a single paper by ID."""
-    p = db.query(Paper).filter(Paper.id == paper_id).first()
+    p = db.query(Paper).options(undefer_group("text")).filter(Paper.id == paper_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="Paper not found")
     return _serialize(p)
@@ -3,8 +3,12 @@ from apscheduler.triggers.cron import CronTrigger
 from app.services.processing import process_papers_batch
 from app.agents.biorxiv_scraper import BiorxivScraper
 from app.agents.pubmed_scraper import PubmedScraper
+from app.agents.scraper import ArxivScraper
 from app.database import SessionLocal
+from app.models import JobHistory
 from app.config import settings
+from app import http_client
+from datetime import datetime
 import asyncio
 import logging
 
@@ -12,44 +16,86 @@ logger = logging.getLogger(__name__)
 
 scheduler = BackgroundScheduler()
 
-def scrape_all_sources():
-    """Scrape papers from all sources daily"""
+async def _scrape_source(name, scraper, checkpoint_query, **kwargs):
+    """Ingest one source through its own session, recording the run in JobHistory
+    
+    Errors and timeouts end only this source's run; papers saved before
+    them are kept, but the checkpoint is not advanced.
+    """
     db = SessionLocal()
+    job = JobHistory(job_type='scrape', source=name, started_at=datetime.utcnow(), status='running')
+    db.add(job)
+    db.commit()
     try:
-        # bioRxiv - fetch all papers from last N days
-        try:
-            logger.info(f"Scraping bioRxiv (all papers from last {settings.BIORXIV_DAYS_BACK} days)...")
-            biorxiv_scraper = BiorxivScraper()
-            biorxiv_papers = asyncio.run(biorxiv_scraper.fetch_recent_papers(
-                max_results=settings.BIORXIV_SCRAPE_MAX,
-                days_back=settings.BIORXIV_DAYS_BACK,
-                query=settings.BIORXIV_SCRAPE_QUERY or None
-            ))
-            saved = biorxiv_scraper.save_papers(db, biorxiv_papers)
-            logger.info(f"bioRxiv: fetched {len(biorxiv_papers)}, saved {saved} new papers")
-        except Exception as e:
-            logger.error(f"Error scraping bioRxiv: {e}")
-        
-        # PubMed - fetch all papers with configured query
-        try:
-            logger.info(f"Scraping PubMed (query: '{settings.PUBMED_SCRAPE_QUERY}')...")
-            pubmed_scraper = PubmedScraper()
-            pubmed_papers = asyncio.run(pubmed_scraper.fetch_recent_papers(
-                max_results=settings.PUBMED_SCRAPE_MAX, 
-                query=settings.PUBMED_SCRAPE_QUERY
-            ))
-            saved = pubmed_scraper.save_papers(db, pubmed_papers)
-            logger.info(f"PubMed: fetched {len(pubmed_papers)}, saved {saved} new papers")
-        except Exception as e:
-            logger.error(f"Error scraping PubMed: {e}")
-            
+        result = await asyncio.wait_for(
+            scraper.ingest(db, checkpoint=scraper.get_checkpoint(db, checkpoint_query), **kwargs),
+            timeout=settings.SCRAPE_SOURCE_TIMEOUT
+        )
+        scraper.save_checkpoint(db, checkpoint_query)
+        job.status = 'success'
+        job.result = result
+        logger.info(f"{name}: fetched {result['fetched']}, saved {result['saved']} new papers")
+    except asyncio.TimeoutError:
+        job.status = 'failed'
+        job.error = f"Timed out after {settings.SCRAPE_SOURCE_TIMEOUT}s"
+        logger.error(f"Scraping {name} timed out after {settings.SCRAPE_SOURCE_TIMEOUT}s")
+    except Exception as e:
+        db.rollback()
+        job.status = 'failed'
+        job.error = str(e)
+        logger.error(f"Error scraping {name}: {e}")
     finally:
+        job.completed_at = datetime.utcnow()
+        db.commit()
         db.close()
 
+async def _scrape_sources():
+    """Run every configured source concurrently on the current event loop"""
+    runs = []
+    
+    # bioRxiv - fetch all papers from last N days
+    logger.info(f"Scraping bioRxiv (all papers from last {settings.BIORXIV_DAYS_BACK} days)...")
+    biorxiv_query = settings.BIORXIV_SCRAPE_QUERY or None
+    runs.append(_scrape_source(
+        "biorxiv", BiorxivScraper(), biorxiv_query,
+        max_results=settings.BIORXIV_SCRAPE_MAX,
+        days_back=settings.BIORXIV_DAYS_BACK,
+        query=biorxiv_query
+    ))
+    
+    # PubMed - fetch all papers with configured query
+    logger.info(f"Scraping PubMed (query: '{settings.PUBMED_SCRAPE_QUERY}')...")
+    runs.append(_scrape_source(
+        "pubmed", PubmedScraper(), settings.PUBMED_SCRAPE_QUERY,
+        max_results=settings.PUBMED_SCRAPE_MAX,
+        query=settings.PUBMED_SCRAPE_QUERY
+    ))
+    
+    # arXiv - page through the configured categories
+    if settings.ARXIV_CATEGORIES:
+        arxiv_query = ",".join(settings.ARXIV_CATEGORIES)
+        logger.info(f"Scraping arXiv (categories: {arxiv_query})...")
+        runs.append(_scrape_source(
+            "arxiv", ArxivScraper(), arxiv_query,
+            max_results=settings.ARXIV_SCRAPE_MAX,
+            categories=settings.ARXIV_CATEGORIES
+        ))
+    
+    await asyncio.gather(*runs)
+
+def scrape_all_sources():
+    """Scrape papers from all sources daily, fetching only what is new since the last checkpoint
+    
+    Sources are fetched concurrently on one event loop, so the run takes
+    as long as the slowest source rather than the sum of all of them.
+    """
+    started = datetime.utcnow()
+    http_client.run(_scrape_sources())
+    logger.info(f"Daily scrape finished in {(datetime.utcnow() - started).total_seconds():.1f}s")
+
 def process_papers_job():
     """Process unprocessed papers in batches"""
-    from datetime import datetime
-    from app.models import Paper, JobHistory
+    from app.services.stats import get_stats
     
     db = SessionLocal()
     job = JobHistory(job_type='process', started_at=datetime.utcnow(), status='running')
@@ -69,9 +115,7 @@ def process_papers_job():
             logger.info(f"Processed {result['processed']} papers, {result['errors']} errors")
         
         # Check if there are more papers to process
-        remaining = db.query(Paper).filter(
-            (Paper.summary == None) | (Paper.summary == "")
-        ).count()
+        remaining = get_stats(db)["pending"]
         
         if remaining > 0:
             logger.info(f"{remaining} papers remaining to process")
@@ -87,6 +131,18 @@ def process_papers_job():
     finally:
         db.close()
 
+def reconcile_stats_job():
+    """Recompute the stats counters to correct any drift"""
+    from app.services.stats import reconcile_stats
+    
+    db = SessionLocal()
+    try:
+        reconcile_stats(db)
+    except Exception as e:
+        logger.error(f"Error reconciling stats: {e}")
+    finally:
+        db.close()
+
 def start_scheduler():
     """Start the scheduler with all jobs"""
     # Daily scraping at 6 AM
@@ -100,6 +156,13 @@ def start_scheduler():
         id="process_papers"
     )
     
+    scheduler.add_job(
+        reconcile_stats_job,
+        'interval',
+        minutes=settings.STATS_RECONCILE_MINUTES,
+        id="reconcile_stats"
+    )
+    
     scheduler.start()
     logger.info(f"Scheduler started - processing {settings.PROCESS_BATCH_SIZE} papers every {settings.PROCESS_INTERVAL_MINUTES} minutes")
 
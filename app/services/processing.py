@@ -1,7 +1,7 @@
 import logging
 from app.config import settings
 from app.database import SessionLocal
-from app.models import Paper
+from app.models import Paper, ProcessingState
 from app.repositories import PaperRepository, CategoryRepository
 
 logger = logging.getLogger(__name__)
@@ -73,26 +73,35 @@ def process_paper(paper_id: int) -> dict:
             if cat not in paper.categories:
                 paper.categories.append(cat)
 
-        # Summary = abstract (or title fallback)
+        # Summary = abstract (stored as a reference to it, see Paper.summary), or title fallback
         if paper.abstract and len(paper.abstract.strip()) >= settings.MIN_ABSTRACT_LENGTH:
             paper.summary = paper.abstract
         else:
             paper.summary = f"Research paper: {paper.title}"
 
+        paper_repo.set_state(paper, ProcessingState.DONE)
         paper_repo.update(paper)
         return {"paper_id": paper_id, "categories": category_names}
+    except Exception:
+        db.rollback()
+        paper = db.query(Paper).filter(Paper.id == paper_id).first()
+        if paper:
+            PaperRepository(db).set_state(paper, ProcessingState.FAILED)
+            db.commit()
+        raise
     finally:
         db.close()
 
 
 def process_papers_batch(limit: int = 10) -> dict:
-    """Process unprocessed papers in a batch."""
+    """Process pending papers in a batch.
+
+    The batch claims its papers (state processing) up front, so concurrent
+    runs from the scheduler, API and CLI never pick the same paper.
+    """
     db = SessionLocal()
     try:
-        papers = db.query(Paper).filter(
-            (Paper.summary == None) | (Paper.summary == "")
-        ).limit(limit).all()
-        ids = [p.id for p in papers]
+        ids = PaperRepository(db).claim_pending(limit)
     finally:
         db.close()
 
@@ -0,0 +1,77 @@
+"""Paper and category statistics read from maintained counters
+
+stats_counters holds the totals the dashboard, /stats, /jobs/status and
+the CLI show. Ingest, processing and category creation adjust them in
+the same transaction as the change they count; reconcile_stats()
+recomputes them from the tables (scheduled every
+STATS_RECONCILE_MINUTES) to correct drift from writes that bypass the
+repositories. Reading them is one query over a few dozen rows, whatever
+the size of the papers table.
+
+"Papers this week" is the sum of the per-day counters for the last
+STATS_RECENT_DAYS UTC days, today included.
+"""
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models import Paper, Category, ProcessingState
+from app.repositories.stats_repository import (
+    StatsRepository, PAPERS, CATEGORIES, state_counter, added_counter
+)
+
+logger = logging.getLogger(__name__)
+
+STATS_RECENT_DAYS = 7
+STATES = (ProcessingState.PENDING, ProcessingState.PROCESSING, ProcessingState.DONE, ProcessingState.FAILED)
+
+
+def _recent_days():
+    today = datetime.utcnow().date()
+    return [today - timedelta(days=n) for n in range(STATS_RECENT_DAYS)]
+
+
+def reconcile_stats(db: Session) -> dict:
+    """Recompute every counter from the papers and categories tables
+    
+    Counter updates from other transactions wait until the recount is
+    committed, so none of them is lost in between.
+    """
+    stats = StatsRepository(db)
+    stats.lock()
+    since = datetime.combine(_recent_days()[-1], datetime.min.time())
+    day = func.date(Paper.created_at)
+    row = db.query(
+        func.count(Paper.id),
+        *[func.coalesce(func.sum(case((Paper.processing_state == state, 1), else_=0)), 0) for state in STATES],
+        db.query(func.count(Category.id)).scalar_subquery(),
+    ).one()
+    values = {PAPERS: row[0], CATEGORIES: row[-1]}
+    values.update({state_counter(state): count for state, count in zip(STATES, row[1:-1])})
+    for added_on, count in db.query(day, func.count()).filter(Paper.created_at >= since).group_by(day):
+        values[added_counter(date.fromisoformat(str(added_on)))] = count
+
+    stats.replace(values)
+    db.commit()
+    logger.info(f"Reconciled stats: {values[PAPERS]} papers, {values[CATEGORIES]} categories")
+    return values
+
+
+def get_stats(db: Session) -> dict:
+    """Current totals, from the counters (reconciled first if there are none yet)"""
+    counters = StatsRepository(db).get_all()
+    if PAPERS not in counters:
+        counters = reconcile_stats(db)
+    states = {state: counters.get(state_counter(state), 0) for state in STATES}
+    return {
+        "total_papers": counters.get(PAPERS, 0),
+        "processed": states[ProcessingState.DONE],
+        "unprocessed": counters.get(PAPERS, 0) - states[ProcessingState.DONE],
+        "pending": states[ProcessingState.PENDING],
+        "processing": states[ProcessingState.PROCESSING],
+        "failed": states[ProcessingState.FAILED],
+        "total_categories": counters.get(CATEGORIES, 0),
+        "papers_this_week": sum(counters.get(added_counter(day), 0) for day in _recent_days()),
+    }
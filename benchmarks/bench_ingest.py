@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Time BaseScraper.save_papers against a scratch database.
+
+Two passes per size: a cold one where every paper is new, and a repeat of
+the same papers where every one is a duplicate (the common case for daily
+scrapes that overlap the previous day). With --per-row, the previous
+implementation (one SELECT and one commit per paper) is timed alongside
+for comparison.
+
+The scratch database is a temporary SQLite file unless --database-url
+points elsewhere; its papers table is dropped and recreated first.
+
+Usage:
+    python -m benchmarks.bench_ingest [--sizes 100,1000,5000] [--per-row] [--database-url URL]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.agents.base_scraper import BaseScraper
+from app.agents.pubmed_scraper import PubmedScraper
+from app.database import Base
+from app.models import Paper
+from benchmarks.fixtures import pubmed_xml
+
+
+def save_per_row(db, papers_data):
+    """The pre-bulk save_papers: one lookup and one commit per paper."""
+    saved_count = 0
+    for paper_data in papers_data:
+        try:
+            existing = db.query(Paper).filter(Paper.arxiv_id == paper_data["id"]).first()
+            if not existing:
+                db.add(Paper(arxiv_id=paper_data["id"], title=paper_data["title"],
+                             authors=paper_data["authors"], abstract=paper_data["abstract"],
+                             published_date=paper_data["published"], pdf_url=paper_data["pdf_url"]))
+                db.commit()
+                saved_count += 1
+        except IntegrityError:
+            db.rollback()
+    return saved_count
+
+
+def make_engine(url):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    return create_engine(url, connect_args=connect_args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100,1000,5000", help="Comma-separated paper counts")
+    parser.add_argument("--per-row", action="store_true", help="Also time the per-row implementation")
+    parser.add_argument("--database-url", help="Scratch database (default: temporary SQLite file)")
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.sizes.split(",")]
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = make_engine(url)
+    Session = sessionmaker(bind=engine)
+
+    papers = PubmedScraper().parse_pubmed_response(pubmed_xml(max(sizes)))
+    savers = {"bulk": BaseScraper().save_papers}
+    if args.per_row:
+        savers["per-row"] = save_per_row
+
+    print(f"database: {engine.url.render_as_string(hide_password=True)}\n")
+    print(f"{'papers':>8} {'impl':<8} {'pass':<10} {'saved':>7} {'time':>10} {'papers/s':>12}")
+    for n in sizes:
+        for name, save in savers.items():
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            for label in ("new", "duplicate"):
+                db = Session()
+                start = time.perf_counter()
+                saved = save(db, papers[:n])
+                elapsed = time.perf_counter() - start
+                db.close()
+                expected = n if label == "new" else 0
+                if saved != expected:
+                    sys.exit(f"{name}/{label}: saved {saved}, expected {expected}")
+                print(f"{n:>8} {name:<8} {label:<10} {saved:>7} {elapsed * 1000:>8.1f}ms {n / elapsed:>12,.0f}")
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+    if tmpdir:
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Compare memory and latency of the buffered and streaming XML parsers.
+
+Buffered:  response.text + ET.fromstring (parse_pubmed_response / parse_arxiv_response)
+Streaming: XMLPullParser fed from the byte stream (iter_parse_pubmed / iter_parse_arxiv)
+Pool:      the body handed to the PARSE_WORKERS pool (parse_pubmed_payload /
+           parse_arxiv_payload), including the round trip to the worker;
+           only with --pool-workers
+
+Each parser runs on every backend in --backends (ElementTree, and lxml
+when installed; see app/agents/xml_backend.py). All combinations must
+produce identical papers, first on the hand-written edge-case corpus in
+fixtures.py and then on each generated payload, before they are timed.
+Peak memory for the pool is that of this process only.
+
+Usage:
+    python -m benchmarks.bench_parsers [--sizes 100,1000,5000] [--chunk-size 65536]
+                                       [--backends etree,lxml] [--pool-workers 4] [--pool-executor process]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.agents import parse_pool
+from app.agents.xml_backend import LXML_AVAILABLE
+from app.agents.pubmed_scraper import PubmedScraper, parse_pubmed_payload
+from app.agents.scraper import ArxivScraper, parse_arxiv_payload
+from app.config import settings
+from benchmarks.fixtures import pubmed_xml, arxiv_xml, pubmed_edge_xml, arxiv_edge_xml
+
+
+async def _chunks(payload, chunk_size):
+    for i in range(0, len(payload), chunk_size):
+        yield payload[i:i + chunk_size]
+
+
+def _buffered(parse):
+    def run(payload, chunk_size):
+        return parse(payload.decode("utf-8"))
+    return run
+
+
+def _streaming(iter_parse):
+    def run(payload, chunk_size):
+        async def collect():
+            return [paper async for paper in iter_parse(_chunks(payload, chunk_size))]
+        return asyncio.run(collect())
+    return run
+
+
+def _pooled(parse):
+    def run(payload, chunk_size):
+        return asyncio.run(parse_pool.offload(parse, payload))
+    return run
+
+
+def _on_backend(backend, run):
+    def on_backend(payload, chunk_size):
+        settings.XML_PARSER = backend
+        return run(payload, chunk_size)
+    return on_backend
+
+
+def measure(run, payload, chunk_size, repeat=3):
+    """Return (papers, best wall time in seconds, peak traced memory in bytes)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        papers = run(payload, chunk_size)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run(payload, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return papers, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100,1000,5000", help="Comma-separated record counts")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Bytes per streamed chunk")
+    parser.add_argument("--backends", default="etree,lxml" if LXML_AVAILABLE else "etree",
+                        help="Comma-separated XML backends to compare")
+    parser.add_argument("--pool-workers", type=int, default=0, help="Also time the parse pool with this many workers")
+    parser.add_argument("--pool-executor", default="process", choices=["process", "thread"])
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.sizes.split(",")]
+    backends = args.backends.split(",")
+    if "lxml" in backends and not LXML_AVAILABLE:
+        sys.exit("lxml is not installed")
+    settings.PARSE_WORKERS = args.pool_workers
+    settings.PARSE_EXECUTOR = args.pool_executor
+
+    pubmed, arxiv = PubmedScraper(), ArxivScraper()
+    parsers = {
+        "pubmed": {"buffered": _buffered(pubmed.parse_pubmed_response),
+                   "streaming": _streaming(pubmed.iter_parse_pubmed)},
+        "arxiv": {"buffered": _buffered(arxiv.parse_arxiv_response),
+                  "streaming": _streaming(arxiv.iter_parse_arxiv)},
+    }
+    if args.pool_workers:
+        # Pool workers read XML_PARSER from their own environment
+        parsers["pubmed"]["pool"] = _pooled(parse_pubmed_payload)
+        parsers["arxiv"]["pool"] = _pooled(parse_arxiv_payload)
+    suites = [("pubmed", pubmed_xml, pubmed_edge_xml), ("arxiv", arxiv_xml, arxiv_edge_xml)]
+
+    def variants(source):
+        for backend in backends:
+            for name, run in parsers[source].items():
+                if name != "pool" or backend == backends[0]:
+                    yield f"{name}/{backend}" if name != "pool" else name, _on_backend(backend, run)
+
+    for source, _, make_edge_cases in suites:
+        payload = make_edge_cases()
+        results = [(label, run(payload, 64)) for label, run in variants(source)]
+        for label, papers in results[1:]:
+            if papers != results[0][1]:
+                sys.exit(f"{source}/{label}: edge-case output differs from {results[0][0]}")
+    print(f"Parity on edge cases: ok ({', '.join(backends)})\n")
+
+    print(f"{'source':<8} {'records':>8} {'payload':>10} {'parser':<16} {'time':>9} {'rec/s':>10} {'peak mem':>10}")
+    for source, make_payload, _ in suites:
+        for n in sizes:
+            payload = make_payload(n)
+            reference = None
+            for label, run in variants(source):
+                papers, elapsed, peak = measure(run, payload, args.chunk_size)
+                if reference is None:
+                    reference = (label, papers)
+                elif papers != reference[1]:
+                    sys.exit(f"{source}/{label}: output differs from {reference[0]} at n={n}")
+                print(f"{source:<8} {n:>8} {len(payload) / 2**20:>8.1f}MB {label:<16} "
+                      f"{elapsed * 1000:>7.1f}ms {n / elapsed:>10,.0f} {peak / 2**20:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
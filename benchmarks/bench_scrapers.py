@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Measure end-to-end scraper throughput against the local stub servers.
+
+For each source and result size, a stub (stub_servers.py) is started in a
+child process, the scraper is pointed at it through its *_API_BASE setting
+and fetch_recent_papers() is timed. Reported per run:
+
+    papers/s    papers yielded per wall-clock second
+    req/s       requests the stub served per second (including 429/503)
+    peak mem    peak traced Python allocations in the scraper process
+
+Rate limits are lowered to --interval so the numbers reflect the scraper
+rather than the upstream politeness delays; pass --interval -1 to keep the
+configured limits. --parse-workers runs the PubMed and arXiv parsers in the
+PARSE_WORKERS pool instead of inline.
+
+Usage:
+    python -m benchmarks.bench_scrapers [--sources biorxiv,pubmed,arxiv] [--sizes 100,1000,5000]
+                                        [--latency 0.02] [--error-rate 0] [--throttle-rate 0]
+                                        [--parse-workers 0] [--parse-executor process]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import http_client
+from app.agents import rate_limit
+from app.agents.biorxiv_scraper import BiorxivScraper
+from app.agents.pubmed_scraper import PubmedScraper
+from app.agents.scraper import ArxivScraper
+from app.config import settings
+from benchmarks.stub_servers import SOURCES, BIORXIV_DAYS, start_stub, stub_stats
+
+SCRAPERS = {
+    "biorxiv": ("BIORXIV_API_BASE", lambda n: BiorxivScraper().fetch_recent_papers(
+        max_results=n, days_back=BIORXIV_DAYS + 1)),
+    "pubmed": ("PUBMED_API_BASE", lambda n: PubmedScraper().fetch_recent_papers(
+        max_results=n, query="benchmark")),
+    "arxiv": ("ARXIV_API_BASE", lambda n: ArxivScraper().fetch_recent_papers(
+        max_results=n, categories=["q-bio.GN"])),
+}
+
+
+def set_interval(interval):
+    for name in ("RATE_LIMIT_DELAY", "PUBMED_RATE_LIMIT", "PUBMED_API_KEY_RATE_LIMIT",
+                 "BIORXIV_RATE_LIMIT", "BIORXIV_MIN_INTERVAL", "ARXIV_RATE_LIMIT"):
+        setattr(settings, name, interval)
+
+
+def run_once(fetch, n, trace):
+    """Return (papers, seconds, peak bytes) for one cold run."""
+    rate_limit.reset_limiters()
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    papers = http_client.run(fetch(n))
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return papers, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sources", default=",".join(SOURCES), help="Comma-separated sources")
+    parser.add_argument("--sizes", default="100,1000,5000", help="Comma-separated result sizes")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mean stub latency per request (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="Rate limit interval for all hosts (-1 keeps the configured limits)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size (best is reported)")
+    parser.add_argument("--parse-workers", type=int, default=0, help="Parse pool size (0 = parse inline)")
+    parser.add_argument("--parse-executor", default="process", choices=["process", "thread"])
+    args = parser.parse_args()
+    sizes = [int(n) for n in args.sizes.split(",")]
+
+    if args.interval >= 0:
+        set_interval(args.interval)
+    settings.HTTP_CACHE_ENABLED = False
+    settings.RATE_LIMIT_BASE_BACKOFF = 0.05
+    settings.PARSE_WORKERS = args.parse_workers
+    settings.PARSE_EXECUTOR = args.parse_executor
+
+    print(f"{'source':<8} {'papers':>8} {'time':>9} {'papers/s':>10} {'req/s':>8} {'429/5xx':>8} {'peak mem':>10}")
+    for source in args.sources.split(","):
+        setting, fetch = SCRAPERS[source]
+        for n in sizes:
+            process, base_url = start_stub(source, size=n, latency=args.latency,
+                                           error_rate=args.error_rate, throttle_rate=args.throttle_rate)
+            try:
+                setattr(settings, setting, base_url)
+                before = sum(stub_stats(base_url).values())
+                best = None
+                for _ in range(args.repeat):
+                    papers, elapsed, _ = run_once(fetch, n, trace=False)
+                    if best is None or elapsed < best:
+                        best = elapsed
+                stats = stub_stats(base_url)
+                requests = (sum(stats.values()) - before) / args.repeat
+                failures = sum(v for k, v in stats.items() if k >= 400) / args.repeat
+                _, _, peak = run_once(fetch, n, trace=True)
+            finally:
+                process.terminate()
+                process.join()
+            if len(papers) != n:
+                sys.exit(f"{source}: expected {n} papers, got {len(papers)}")
+            print(f"{source:<8} {len(papers):>8} {best * 1000:>7.0f}ms {len(papers) / best:>10,.0f} "
+                  f"{requests / best:>8.1f} {failures:>8.1f} {peak / 2**20:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Time paper search through the full-text index against the ILIKE fallback.
+
+The scratch database is seeded through save_papers and brought up to date
+with the app's migrations, so it gets the same index the API uses: FTS5
+on SQLite, the tsvector column on PostgreSQL (--database-url). Each query
+is then run as GET /papers?search= runs it, counting all matches and
+fetching the first page, once through the index and once with ILIKE.
+
+Match counts differ between the two by design: the index matches whole
+(stemmed) tokens and authors, ILIKE matches substrings of title and
+abstract.
+
+Usage:
+    python -m benchmarks.bench_search [--papers 20000] [--repeat 5] [--database-url URL]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.orm import sessionmaker
+
+from app.agents.base_scraper import BaseScraper
+from app.agents.pubmed_scraper import PubmedScraper
+from app.database import Base, build_engine
+from app.migrations import run_migrations
+from app.models import Paper
+from app.repositories.paper_repository import PaperRepository
+from benchmarks.fixtures import pubmed_xml
+
+QUERIES = ["nanopore", "isoform splicing", '"long-read nanopore"', "transcript*", "Lastname17"]
+PAGE = 20
+
+
+def time_query(repo, query, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        q = repo.apply_search(repo.db.query(Paper), query)
+        total = q.order_by(None).count()
+        q.limit(PAGE).all()
+        times.append(time.perf_counter() - start)
+    return total, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--papers", type=int, default=20000, help="Papers in the scratch database")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (median reported)")
+    parser.add_argument("--database-url", help="Scratch database (default: temporary SQLite file); "
+                                               "its tables are dropped and recreated")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = build_engine(url)
+    Session = sessionmaker(bind=engine)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+
+    papers = PubmedScraper().parse_pubmed_response(pubmed_xml(args.papers))
+    with Session() as db:
+        BaseScraper().save_papers(db, papers)
+
+    db = Session()
+    indexed = PaperRepository(db)
+    fallback = PaperRepository(db)
+    fallback.search_backend = lambda: "like"
+
+    print(f"database: {engine.url.render_as_string(hide_password=True)}, {args.papers} papers, "
+          f"index: {indexed.search_backend()}\n")
+    print(f"{'query':<26} {'index hits':>11} {'index':>10} {'like hits':>10} {'like':>10} {'speedup':>8}")
+    for query in QUERIES:
+        hits, index_time = time_query(indexed, query, args.repeat)
+        like_hits, like_time = time_query(fallback, query, args.repeat)
+        print(f"{query:<26} {hits:>11} {index_time * 1000:>8.1f}ms {like_hits:>10} {like_time * 1000:>8.1f}ms "
+              f"{like_time / index_time:>7.1f}x")
+    db.close()
+
+    if tmpdir:
+        engine.dispose()
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+    else:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
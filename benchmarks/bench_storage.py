@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write throughput of a SQLite file under each storage profile.
+
+Writer threads mimic the scheduler: ingest a small batch of papers through
+save_papers, then mark a few papers processed, committing each step.
+Reader threads mimic the API: list the newest papers and count them. Each
+thread uses its own session from an engine built by app.database with the
+given profile (see DB_PROFILE), against a fresh database file.
+
+Reported per profile: writes/s, reads/s, the worst read latency, and how
+many operations failed with "database is locked".
+
+Usage:
+    python -m benchmarks.bench_storage [--profiles compat,performance] [--writers 2]
+                                       [--readers 8] [--duration 5] [--seed-papers 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.agents.base_scraper import BaseScraper
+from app.agents.pubmed_scraper import PubmedScraper
+from app.database import Base, PROFILES, build_engine
+from app.models import Paper, ProcessingState
+from benchmarks.fixtures import pubmed_xml
+
+WRITE_BATCH = 20
+
+
+def run_profile(profile, papers, args):
+    tmpdir = tempfile.mkdtemp()
+    engine = build_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}", profile)
+    Session = sessionmaker(bind=engine)
+    Base.metadata.create_all(engine)
+    scraper = BaseScraper()
+    with Session() as db:
+        scraper.save_papers(db, papers[:args.seed_papers])
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    counts = {"writes": 0, "reads": 0, "locked": 0, "max_read": 0.0}
+    fresh = iter(range(args.seed_papers, len(papers), WRITE_BATCH))
+
+    def writer():
+        with Session() as db:
+            while not stop.is_set():
+                with lock:
+                    start = next(fresh, None)
+                if start is None:
+                    break
+                try:
+                    scraper.save_papers(db, papers[start:start + WRITE_BATCH])
+                    pending = db.query(Paper).filter(Paper.processing_state == ProcessingState.PENDING)
+                    for paper in pending.limit(5):
+                        paper.summary = paper.abstract[:200]
+                        paper.processing_state = ProcessingState.DONE
+                    db.commit()
+                    with lock:
+                        counts["writes"] += 1
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        counts["locked"] += 1
+
+    def reader():
+        with Session() as db:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    db.query(Paper).order_by(Paper.created_at.desc()).limit(20).all()
+                    db.query(Paper).count()
+                    db.rollback()  # end the read transaction, as a request would
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        counts["reads"] += 1
+                        counts["max_read"] = max(counts["max_read"], elapsed)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        counts["locked"] += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+    return counts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", default=",".join(reversed(PROFILES)), help="Comma-separated profiles")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per profile")
+    parser.add_argument("--seed-papers", type=int, default=5000, help="Papers stored before the run")
+    args = parser.parse_args()
+
+    # Enough fresh papers that writers don't run out during the run
+    papers = PubmedScraper().parse_pubmed_response(pubmed_xml(args.seed_papers + 20000))
+
+    print(f"{args.writers} writers ({WRITE_BATCH} papers + 5 updates per write), {args.readers} readers, "
+          f"{args.duration:.0f}s per profile\n")
+    print(f"{'profile':<12} {'writes/s':>10} {'reads/s':>10} {'max read':>10} {'locked':>8}")
+    for profile in args.profiles.split(","):
+        counts, elapsed = run_profile(profile, papers, args)
+        print(f"{profile:<12} {counts['writes'] / elapsed:>10.1f} {counts['reads'] / elapsed:>10.1f} "
+              f"{counts['max_read'] * 1000:>8.0f}ms {counts['locked']:>8}")
+
+
+if __name__ == "__main__":
+    main()
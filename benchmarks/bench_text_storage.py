@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Database size and list latency with plain vs compressed text storage.
+
+Each mode gets a fresh SQLite file, seeded through save_papers with
+processed papers (summary = abstract, as process_paper sets it):
+
+    plain       TEXT_COMPRESSION=none, SUMMARY_REFERENCES_ABSTRACT=false:
+                every abstract stored twice and uncompressed
+    flag        the defaults: uncompressed, and a summary equal to the
+                abstract stored as a flag
+    compressed  as flag, with TEXT_COMPRESSION=zlib
+    zstd        as flag, with zstd (only if zstandard is installed)
+
+The fixture abstracts repeat a 20-word vocabulary and would compress far
+better than real ones. Abstracts here are drawn instead from a
+Zipf-distributed 5,000-word vocabulary, which zlib compresses about as
+well as English prose.
+
+Reported per mode:
+- database size after VACUUM, and bytes in the text columns
+- median latency of three list queries:
+  - api: a /papers page of 20 with text, serialized as the API does
+  - cli: a page of 20 without text, as `papers list`
+  - report: 1,000 papers with text, as report generation reads them
+
+With --from-db, the same report is run on a copy of an existing SQLite
+database before and after the app's migrations, with --codec (zlib by
+default) as TEXT_COMPRESSION. Latency is only measured after migrating,
+since the current models cannot read an unmigrated papers table. The
+original file is not modified.
+
+Usage:
+    python -m benchmarks.bench_text_storage [--papers 20000] [--repeat 7]
+    python -m benchmarks.bench_text_storage --from-db paper_search.db [--codec zlib]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker, selectinload, undefer_group
+
+from app.agents.base_scraper import BaseScraper
+from app.agents.pubmed_scraper import PubmedScraper
+from app.compression import ZSTD_AVAILABLE
+from app.config import settings
+from app.database import Base, build_engine
+from app.migrations import run_migrations
+from app.models import Paper, ProcessingState
+from app.repositories.paper_repository import PaperRepository
+from app.routers.papers import _serialize
+from benchmarks.fixtures import pubmed_xml
+
+MODES = {
+    "plain": {"TEXT_COMPRESSION": "none", "SUMMARY_REFERENCES_ABSTRACT": False},
+    "flag": {"TEXT_COMPRESSION": "none", "SUMMARY_REFERENCES_ABSTRACT": True},
+    "compressed": {"TEXT_COMPRESSION": "zlib", "SUMMARY_REFERENCES_ABSTRACT": True},
+    "zstd": {"TEXT_COMPRESSION": "zstd", "SUMMARY_REFERENCES_ABSTRACT": True},
+}
+PAGE = 20
+REPORT_ROWS = 1000
+BATCH = 1000
+
+_vocab_rng = random.Random(0)
+VOCAB = ["".join(_vocab_rng.choices("etaoinshrdlcumwfgypbvk", k=_vocab_rng.randint(2, 11))) for _ in range(5000)]
+ZIPF = [1 / rank for rank in range(1, len(VOCAB) + 1)]
+
+
+def abstract_text(i):
+    rng = random.Random(i)
+    sentences = []
+    for _ in range(rng.randint(6, 12)):
+        words = rng.choices(VOCAB, weights=ZIPF, k=rng.randint(12, 30))
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def seed(Session, count):
+    papers = PubmedScraper().parse_pubmed_response(pubmed_xml(count))
+    for i, paper in enumerate(papers):
+        paper["abstract"] = abstract_text(i)
+    with Session() as db:
+        BaseScraper().save_papers(db, papers)
+        last_id = 0
+        while True:
+            batch = db.query(Paper).options(undefer_group("text")).filter(
+                Paper.id > last_id).order_by(Paper.id).limit(BATCH).all()
+            if not batch:
+                break
+            for paper in batch:
+                paper.summary = paper.abstract
+                paper.processing_state = ProcessingState.DONE
+            db.commit()
+            last_id = batch[-1].id
+
+
+def measure_size(engine):
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("VACUUM")
+        size = conn.exec_driver_sql("PRAGMA page_count").scalar() * conn.exec_driver_sql("PRAGMA page_size").scalar()
+        text_bytes = conn.execute(text(
+            "SELECT COALESCE(SUM(LENGTH(CAST(abstract AS BLOB))), 0) + "
+            "COALESCE(SUM(LENGTH(CAST(summary AS BLOB))), 0) FROM papers"
+        )).scalar()
+    return size, text_bytes
+
+
+def list_api(db):
+    q = db.query(Paper).options(selectinload(Paper.categories), undefer_group("text"))
+    rows, _ = PaperRepository(db).paginate(q, PAGE)
+    return [_serialize(p) for p in rows]
+
+
+def list_cli(db):
+    rows, _ = PaperRepository(db).paginate(db.query(Paper).options(selectinload(Paper.categories)), PAGE)
+    return [(p.id, p.title, p.processing_state, [c.name for c in p.categories]) for p in rows]
+
+
+def list_report(db):
+    rows = db.query(Paper).options(selectinload(Paper.categories), undefer_group("text")).order_by(
+        Paper.created_at.desc()).limit(REPORT_ROWS).all()
+    return sum(len(p.abstract or "") + len(p.summary or "") for p in rows)
+
+
+def measure_latency(Session, repeat):
+    results = {}
+    for name, func in (("api", list_api), ("cli", list_cli), ("report", list_report)):
+        times = []
+        for _ in range(repeat):
+            with Session() as db:
+                start = time.perf_counter()
+                func(db)
+                times.append(time.perf_counter() - start)
+        results[name] = statistics.median(times)
+    return results
+
+
+def report_row(label, size, text_bytes, latency=None):
+    timings = (f"{latency['api'] * 1000:>8.2f}ms {latency['cli'] * 1000:>8.2f}ms {latency['report'] * 1000:>9.1f}ms"
+               if latency else f"{'-':>10} {'-':>10} {'-':>11}")
+    print(f"{label:<12} {size / 1e6:>9.1f}MB {text_bytes / 1e6:>9.1f}MB {timings}")
+
+
+def header():
+    print(f"{'storage':<12} {'db size':>11} {'text':>11} {'api page':>10} {'cli page':>10} {'report':>11}")
+
+
+def run_from_db(path, repeat, codec):
+    settings.TEXT_COMPRESSION = codec
+    tmpdir = tempfile.mkdtemp()
+    copy = os.path.join(tmpdir, "copy.db")
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(copy)
+    source.backup(target)
+    source.close()
+    target.close()
+
+    header()
+    engine = build_engine(f"sqlite:///{copy}")
+    Base.metadata.create_all(engine)
+    # No latency before migrating: the current models cannot read the unmigrated papers table
+    report_row("before", *measure_size(engine))
+    migrated = run_migrations(engine)
+    size, text_bytes = measure_size(engine)
+    report_row("after", size, text_bytes, measure_latency(sessionmaker(bind=engine), repeat))
+    print(f"\nmigrations applied: {', '.join(migrated) or 'none'}")
+    engine.dispose()
+    for name in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, name))
+    os.rmdir(tmpdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--papers", type=int, default=20000, help="Papers per scratch database")
+    parser.add_argument("--repeat", type=int, default=7, help="Runs per list query (median reported)")
+    parser.add_argument("--from-db", help="Report on a copy of this SQLite database before and after migrating")
+    parser.add_argument("--codec", default="zlib", choices=["none", "zlib", "zstd"],
+                        help="TEXT_COMPRESSION for --from-db")
+    args = parser.parse_args()
+
+    if args.from_db:
+        run_from_db(args.from_db, args.repeat, args.codec)
+        return
+
+    modes = [mode for mode in MODES if mode != "zstd" or ZSTD_AVAILABLE]
+    print(f"{args.papers} processed papers per database"
+          + ("" if ZSTD_AVAILABLE else " (zstd skipped: zstandard not installed)") + "\n")
+    header()
+    baseline = None
+    for mode in modes:
+        for name, value in MODES[mode].items():
+            setattr(settings, name, value)
+        tmpdir = tempfile.mkdtemp()
+        engine = build_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        run_migrations(engine)
+        Session = sessionmaker(bind=engine)
+        seed(Session, args.papers)
+
+        size, text_bytes = measure_size(engine)
+        report_row(mode, size, text_bytes, measure_latency(Session, args.repeat))
+        baseline = baseline or size
+        if size != baseline:
+            print(f"{'':<12} {size / baseline:>10.0%} of plain")
+
+        engine.dispose()
+        for name in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, name))
+        os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Synthetic source payloads shaped like real bioRxiv, PubMed and arXiv responses.
+
+Records are deterministic for a given index, so any two runs (or two
+parsers) see byte-identical input.
+"""
+
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+WORDS = ("long-read transcriptome isoform nanopore splicing cell genome assembly "
+         "variant expression single-cell chromatin method benchmark pipeline tumor "
+         "immune microbiome sequencing alignment protein pathway").split()
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _text(i, n_words):
+    return " ".join(WORDS[(i * 7 + k * 3) % len(WORDS)] for k in range(n_words))
+
+
+def _authors(i, n=8):
+    return [(f"Forename{(i + k) % 97}", f"Lastname{(i * 3 + k) % 211}") for k in range(n)]
+
+
+def pubmed_article(i):
+    pmid = 30000000 + i
+    authors = "".join(
+        f"<Author ValidYN=\"Y\"><LastName>{last}</LastName><ForeName>{first}</ForeName>"
+        f"<Initials>{first[0]}</Initials><AffiliationInfo><Affiliation>Department {k}, "
+        f"University {i % 50}, City</Affiliation></AffiliationInfo></Author>"
+        for k, (first, last) in enumerate(_authors(i))
+    )
+    mesh = "".join(
+        f"<MeshHeading><DescriptorName UI=\"D{i + k:06d}\" MajorTopicYN=\"N\">{_text(i + k, 2)}</DescriptorName>"
+        f"<QualifierName UI=\"Q{k:06d}\" MajorTopicYN=\"N\">methods</QualifierName></MeshHeading>"
+        for k in range(12)
+    )
+    references = "".join(
+        f"<Reference><Citation>{escape(_text(i + k, 12))}. J Biol. {2000 + k % 24}.</Citation>"
+        f"<ArticleIdList><ArticleId IdType=\"pubmed\">{20000000 + i + k}</ArticleId></ArticleIdList></Reference>"
+        for k in range(25)
+    )
+    return (
+        f"<PubmedArticle><MedlineCitation Status=\"MEDLINE\" Owner=\"NLM\"><PMID Version=\"1\">{pmid}</PMID>"
+        f"<Article PubModel=\"Print\"><Journal><JournalIssue CitedMedium=\"Internet\"><Volume>{i % 40}</Volume>"
+        f"<PubDate><Year>{2015 + i % 10}</Year><Month>{MONTHS[i % 12]}</Month><Day>{1 + i % 28:02d}</Day></PubDate>"
+        f"</JournalIssue><Title>Journal {i % 30}</Title></Journal>"
+        f"<ArticleTitle>{escape(_text(i, 14))} <i>in vivo</i></ArticleTitle>"
+        f"<Abstract><AbstractText>{escape(_text(i, 220))}</AbstractText></Abstract>"
+        f"<AuthorList CompleteYN=\"Y\">{authors}</AuthorList></Article>"
+        f"<MeshHeadingList>{mesh}</MeshHeadingList></MedlineCitation>"
+        f"<PubmedData><ReferenceList>{references}</ReferenceList></PubmedData></PubmedArticle>"
+    )
+
+
+def pubmed_xml(n, start=0):
+    """A PubmedArticleSet document with n articles (efetch retmode=xml)."""
+    body = "".join(pubmed_article(i) for i in range(start, start + n))
+    return ("<?xml version=\"1.0\" ?>\n<!DOCTYPE PubmedArticleSet>\n"
+            f"<PubmedArticleSet>{body}</PubmedArticleSet>").encode()
+
+
+def arxiv_entry(i):
+    arxiv_id = f"2401.{i:05d}v1"
+    day = date(2024, 1, 1) + timedelta(days=i % 365)
+    authors = "".join(f"<author><name>{first} {last}</name></author>" for first, last in _authors(i, 5))
+    return (
+        f"<entry><id>http://arxiv.org/abs/{arxiv_id}</id>"
+        f"<updated>{day}T12:00:00Z</updated><published>{day}T12:00:00Z</published>"
+        f"<title>{escape(_text(i, 12))}</title><summary>{escape(_text(i, 180))}</summary>{authors}"
+        f"<arxiv:primary_category term=\"q-bio.GN\" scheme=\"http://arxiv.org/schemas/atom\"/>"
+        f"<link href=\"http://arxiv.org/abs/{arxiv_id}\" rel=\"alternate\" type=\"text/html\"/>"
+        f"<link title=\"pdf\" href=\"http://arxiv.org/pdf/{arxiv_id}\" rel=\"related\" type=\"application/pdf\"/>"
+        f"<category term=\"q-bio.GN\" scheme=\"http://arxiv.org/schemas/atom\"/></entry>"
+    )
+
+
+def arxiv_xml(n, start=0, total=None):
+    """An Atom feed with n entries, as returned by the arXiv query API."""
+    body = "".join(arxiv_entry(i) for i in range(start, start + n))
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n"
+        "<feed xmlns=\"http://www.w3.org/2005/Atom\" xmlns:arxiv=\"http://arxiv.org/schemas/atom\" "
+        "xmlns:opensearch=\"http://a9.com/-/spec/opensearch/1.1/\">"
+        "<title type=\"html\">ArXiv Query</title><id>http://arxiv.org/api/query</id>"
+        f"<opensearch:totalResults>{total if total is not None else n}</opensearch:totalResults>"
+        f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+        f"<opensearch:itemsPerPage>{n}</opensearch:itemsPerPage>{body}</feed>"
+    ).encode()
+
+
+def biorxiv_entry(i, day):
+    doi = f"10.1101/{day:%Y.%m.%d}.{i:06d}"
+    authors = "; ".join(f"{last}, {first[0]}." for first, last in _authors(i, 6))
+    return {
+        "doi": doi,
+        "title": _text(i, 12),
+        "authors": authors,
+        "author_corresponding": f"Forename{i % 97} Lastname{i % 211}",
+        "date": f"{day:%Y-%m-%d}",
+        "version": "1",
+        "type": "new results",
+        "license": "cc_by",
+        "category": "bioinformatics",
+        "abstract": _text(i, 200),
+        "published": "NA",
+        "server": "biorxiv",
+    }
+
+
+# Hand-written records covering the parsers' edge cases; used for parity
+# checks between parser backends rather than for timing.
+PUBMED_EDGE_CASES = [
+    # Structured abstract (only the first section is kept), markup and entities in the title
+    "<PubmedArticle><MedlineCitation><PMID Version=\"1\">1</PMID><Article><Journal><JournalIssue>"
+    "<PubDate><Year>2020</Year><Month>05</Month><Day>07</Day></PubDate></JournalIssue></Journal>"
+    "<ArticleTitle>CRISPR &amp; <i>Cas9</i> in <sup>13</sup>C &#945;-cells<!-- note --></ArticleTitle>"
+    "<Abstract><AbstractText Label=\"BACKGROUND\">First <b>part</b>.</AbstractText>"
+    "<AbstractText Label=\"METHODS\">Second part.</AbstractText></Abstract>"
+    "<AuthorList><Author><LastName>Smith</LastName><ForeName>Jane</ForeName></Author>"
+    "<Author><CollectiveName>The Consortium</CollectiveName></Author>"
+    "<Author><LastName>Onlylast</LastName></Author></AuthorList></Article></MedlineCitation>"
+    "<PubmedData><ReferenceList><Reference><ArticleIdList><ArticleId IdType=\"pubmed\">999</ArticleId>"
+    "</ArticleIdList></Reference></ReferenceList></PubmedData></PubmedArticle>",
+    # No abstract, no authors, MedlineDate instead of Year/Month/Day
+    "<PubmedArticle><MedlineCitation><PMID>2</PMID><Article><Journal><JournalIssue>"
+    "<PubDate><MedlineDate>2019 Nov-Dec</MedlineDate></PubDate></JournalIssue></Journal>"
+    "<ArticleTitle>Untitled study</ArticleTitle></Article></MedlineCitation></PubmedArticle>",
+    # Season instead of a month, empty title element
+    "<PubmedArticle><MedlineCitation><PMID>3</PMID><Article><Journal><JournalIssue>"
+    "<PubDate><Year>2021</Year><Season>Spring</Season></PubDate></JournalIssue></Journal>"
+    "<ArticleTitle/><Abstract><AbstractText>Abstract only.</AbstractText></Abstract></Article>"
+    "</MedlineCitation></PubmedArticle>",
+    # Invalid day: skipped by the parser
+    "<PubmedArticle><MedlineCitation><PMID>4</PMID><Article><Journal><JournalIssue>"
+    "<PubDate><Year>2021</Year><Month>Feb</Month><Day>30</Day></PubDate></JournalIssue></Journal>"
+    "<ArticleTitle>Bad date</ArticleTitle></Article></MedlineCitation></PubmedArticle>",
+    # No PubDate at all: skipped by the parser
+    "<PubmedArticle><MedlineCitation><PMID>5</PMID><Article>"
+    "<ArticleTitle>No date</ArticleTitle></Article></MedlineCitation></PubmedArticle>",
+    # Future placeholder date, capped at today
+    "<PubmedArticle><MedlineCitation><PMID>6</PMID><Article><Journal><JournalIssue>"
+    "<PubDate><Year>2999</Year><Month>Dec</Month></PubDate></JournalIssue></Journal>"
+    "<ArticleTitle>Ahead of print</ArticleTitle></Article></MedlineCitation></PubmedArticle>",
+]
+
+ARXIV_EDGE_CASES = [
+    # Multi-line title and summary, single author, no pdf link
+    "<entry><id>http://arxiv.org/abs/2401.99901v2</id><published>2024-02-03T04:05:06Z</published>"
+    "<title>\n  A title split\n  over lines </title><summary>\n Summary with &lt;tags&gt; &amp; more.\n</summary>"
+    "<author><name>Solo Author</name><arxiv:affiliation>Somewhere</arxiv:affiliation></author>"
+    "<link href=\"http://arxiv.org/abs/2401.99901v2\" rel=\"alternate\" type=\"text/html\"/></entry>",
+    # Old-style identifier, several links
+    "<entry><id>http://arxiv.org/abs/q-bio/0601001v1</id><published>2006-01-01T00:00:00Z</published>"
+    "<title>Old id</title><summary>S</summary><author><name>A One</name></author><author><name>B Two</name></author>"
+    "<link title=\"doi\" href=\"http://dx.doi.org/10.1/x\" rel=\"related\"/>"
+    "<link title=\"pdf\" href=\"http://arxiv.org/pdf/q-bio/0601001v1\" rel=\"related\" type=\"application/pdf\"/></entry>",
+]
+
+
+def pubmed_edge_xml():
+    """PubMed edge cases plus a few regular articles, as one efetch document."""
+    body = "".join(PUBMED_EDGE_CASES) + "".join(pubmed_article(i) for i in range(3))
+    return f"<?xml version=\"1.0\" ?>\n<PubmedArticleSet>{body}</PubmedArticleSet>".encode()
+
+
+def arxiv_edge_xml():
+    """arXiv edge cases plus a few regular entries, as one Atom feed."""
+    regular = arxiv_xml(3).decode()
+    return regular.replace("</feed>", "".join(ARXIV_EDGE_CASES) + "</feed>").encode()
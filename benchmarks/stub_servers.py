@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the bioRxiv, NCBI E-utilities and arXiv APIs.
+
+Each stub serves synthetic payloads from fixtures.py (or responses recorded
+in an HTTP cache directory, see --replay) with configurable latency, error
+rate and 429 rate. Point the scrapers at them through the *_API_BASE
+settings:
+
+    python -m benchmarks.stub_servers --size 2000 --latency 0.05 --throttle-rate 0.02
+    # prints e.g. BIORXIV_API_BASE=http://127.0.0.1:41233/details/biorxiv ...
+
+Every stub also answers GET /_stats with the number of requests it served,
+split by status code.
+
+Usage:
+    python -m benchmarks.stub_servers [--size 1000] [--latency 0] [--error-rate 0]
+                                      [--throttle-rate 0] [--replay DIR]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import pubmed_xml, arxiv_xml, biorxiv_entry
+
+SOURCES = ("biorxiv", "pubmed", "arxiv")
+
+# Path the scrapers expect under each base URL, and the real base it stands in for
+BASE_PATHS = {
+    "biorxiv": ("/details/biorxiv", "https://api.biorxiv.org/details/biorxiv"),
+    "pubmed": ("/entrez/eutils", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"),
+    "arxiv": ("/api/query", "https://export.arxiv.org/api/query"),
+}
+
+BIORXIV_PAGE_SIZE = 100
+BIORXIV_DAYS = 30
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        if parts.path == "/_stats":
+            return self._send(200, json.dumps(dict(server.stats)).encode(), "application/json", count=False)
+
+        if server.latency:
+            time.sleep(server.latency * server.random().uniform(0.5, 1.5))
+        roll = server.random().random()
+        if roll < server.throttle_rate:
+            return self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": str(server.retry_after)})
+        if roll < server.throttle_rate + server.error_rate:
+            return self._send(503, b"Service Unavailable", "text/plain")
+
+        base_path, real_base = BASE_PATHS[server.source]
+        if not parts.path.startswith(base_path):
+            return self._send(404, b"Not Found", "text/plain")
+        if server.replay:
+            return self._replay(real_base + parts.path[len(base_path):], params)
+        body, content_type = getattr(self, f"_{server.source}")(parts.path[len(base_path):], params)
+        if body is None:
+            return self._send(400, b"Bad Request", "text/plain")
+        self._send(200, body, content_type)
+
+    def _biorxiv(self, path, params):
+        match = re.fullmatch(r"/(\d{4}-\d\d-\d\d)/(\d{4}-\d\d-\d\d)/(\d+)/json", path)
+        if not match:
+            return None, None
+        start, end = date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))
+        rows = [(i, day) for i, day in self.server.biorxiv_rows if start <= day <= end]
+        cursor = int(match.group(3))
+        page = [biorxiv_entry(i, day) for i, day in rows[cursor:cursor + BIORXIV_PAGE_SIZE]]
+        data = {
+            "messages": [{"status": "ok", "cursor": cursor, "count": len(page), "total": len(rows)}],
+            "collection": page,
+        }
+        return json.dumps(data).encode(), "application/json"
+
+    def _pubmed(self, path, params):
+        size = self.server.size
+        if path == "/esearch.fcgi":
+            data = {"esearchresult": {"count": str(size), "retmax": "0", "retstart": "0",
+                                      "querykey": "1", "webenv": "STUB_WEBENV", "idlist": []}}
+            return json.dumps(data).encode(), "application/json"
+        if path == "/efetch.fcgi":
+            start = int(params.get("retstart", 0))
+            count = max(0, min(int(params.get("retmax", 20)), size - start))
+            return pubmed_xml(count, start=start), "text/xml"
+        return None, None
+
+    def _arxiv(self, path, params):
+        size = self.server.size
+        category = re.search(r"cat:(\S+)", params.get("search_query", ""))
+        # Give each category its own id range so they don't dedupe away
+        offset = sum(map(ord, category.group(1))) * size if category else 0
+        start = int(params.get("start", 0))
+        count = max(0, min(int(params.get("max_results", 10)), size - start))
+        return arxiv_xml(count, start=offset + start, total=size), "application/atom+xml"
+
+    def _replay(self, url, params):
+        import httpx
+        cache = self.server.replay
+        request = httpx.Request("GET", url, params=params)
+        entry = cache.lookup(cache.key(request))
+        if entry is None:
+            return self._send(404, b"Not recorded", "text/plain")
+        body = (cache.blobs / entry["body"]).read_bytes()
+        cache.note_history(request, body)  # So the efetch pages of a replayed esearch are found
+        self._send(entry["status"], body, entry["headers"].get("content-type", "application/octet-stream"))
+
+    def _send(self, status, body, content_type, headers=None, count=True):
+        if count:
+            with self.server.lock:
+                self.server.stats[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, source, port=0, size=1000, latency=0.0, error_rate=0.0,
+                 throttle_rate=0.0, retry_after=1, replay=None, seed=0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.source = source
+        self.size = size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.replay = None
+        if replay:
+            from app.http_cache import ResponseCache
+            self.replay = ResponseCache(replay, max_bytes=float("inf"))
+        self.stats = Counter()
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        # bioRxiv: `size` preprints spread evenly over the last BIORXIV_DAYS days
+        today = date.today()
+        self.biorxiv_rows = [(i, today - timedelta(days=BIORXIV_DAYS - i * BIORXIV_DAYS // max(size, 1)))
+                             for i in range(size)] if source == "biorxiv" else []
+
+    def random(self):
+        return self._random
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}{BASE_PATHS[self.source][0]}"
+
+
+def _serve(source, options, ready):
+    server = StubServer(source, **options)
+    ready.send(server.base_url)
+    ready.close()
+    server.serve_forever()
+
+
+def start_stub(source, **options):
+    """Run a stub server in a child process; returns (process, base_url).
+
+    A separate process keeps the server's CPU time and allocations out of
+    whatever the caller is measuring.
+    """
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_serve, args=(source, options, child), daemon=True)
+    process.start()
+    base_url = parent.recv()
+    return process, base_url
+
+
+def stub_stats(base_url):
+    """Requests served by the stub at base_url, by status code"""
+    import httpx
+    parts = urlsplit(base_url)
+    response = httpx.get(f"{parts.scheme}://{parts.netloc}/_stats")
+    return {int(status): n for status, n in response.json().items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sources", default=",".join(SOURCES), help="Comma-separated stubs to start")
+    parser.add_argument("--size", type=int, default=1000, help="Records available per source (per category for arXiv)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean seconds added to each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--replay", help="Serve responses recorded in this HTTP cache directory")
+    args = parser.parse_args()
+
+    options = {"size": args.size, "latency": args.latency, "error_rate": args.error_rate,
+               "throttle_rate": args.throttle_rate, "retry_after": args.retry_after, "replay": args.replay}
+    processes = []
+    for source in args.sources.split(","):
+        process, base_url = start_stub(source, **options)
+        processes.append(process)
+        print(f"{source.upper()}_API_BASE={base_url}")
+    print("Serving; Ctrl-C to stop", file=sys.stderr)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
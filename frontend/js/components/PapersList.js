@@ -2,18 +2,26 @@ import { api } from '../api.js';
 
 const PAGE_SIZE = 20;
 let currentOffset = 0;
+let currentCursor = null;   // null = first page
+let nextCursor = null;
+let previousCursors = [];
 let currentSearch = '';
 let currentCategory = '';
 
+function resetPaging() {
+    currentOffset = 0;
+    currentCursor = null;
+    nextCursor = null;
+    previousCursors = [];
+}
+
 async function fetchAndRender() {
     const tbody = document.getElementById('papersTable');
     const totalEl = document.getElementById('papersTotalInfo');
     if (!tbody) return;
 
-    const params = new URLSearchParams({
-        limit: PAGE_SIZE,
-        offset: currentOffset,
-    });
+    const params = new URLSearchParams({ limit: PAGE_SIZE });
+    if (currentCursor) params.set('cursor', currentCursor);
     if (currentSearch) params.set('search', currentSearch);
     if (currentCategory) params.set('category', currentCategory);
 
@@ -21,6 +29,7 @@ async function fetchAndRender() {
         const data = await api.get(`/papers?${params}`);
         const papers = data.papers || [];
         const total = data.total || 0;
+        nextCursor = data.next_cursor || null;
 
         if (totalEl) {
             const start = currentOffset + 1;
@@ -42,7 +51,7 @@ async function fetchAndRender() {
         const prevBtn = document.getElementById('prevPageBtn');
         const nextBtn = document.getElementById('nextPageBtn');
         if (prevBtn) prevBtn.disabled = currentOffset === 0;
-        if (nextBtn) nextBtn.disabled = currentOffset + PAGE_SIZE >= total;
+        if (nextBtn) nextBtn.disabled = !nextCursor;
     } catch (error) {
         tbody.innerHTML = `<tr><td colspan="5">Error loading papers: ${error.message}</td></tr>`;
     }
@@ -50,7 +59,7 @@ async function fetchAndRender() {
 
 export async function PapersList() {
     // Reset state on each fresh render
-    currentOffset = 0;
+    resetPaging();
     currentSearch = '';
     currentCategory = '';
 
@@ -94,7 +103,7 @@ export async function PapersList() {
 
         const doSearch = () => {
             currentSearch = searchInput ? searchInput.value.trim() : '';
-            currentOffset = 0;
+            resetPaging();
             fetchAndRender();
         };
 
@@ -103,14 +112,19 @@ export async function PapersList() {
         if (clearBtn) clearBtn.addEventListener('click', () => {
             if (searchInput) searchInput.value = '';
             currentSearch = '';
-            currentOffset = 0;
+            resetPaging();
             fetchAndRender();
         });
         if (prevBtn) prevBtn.addEventListener('click', () => {
+            if (!previousCursors.length) return;
+            currentCursor = previousCursors.pop();
             currentOffset = Math.max(0, currentOffset - PAGE_SIZE);
             fetchAndRender();
         });
         if (nextBtn) nextBtn.addEventListener('click', () => {
+            if (!nextCursor) return;
+            previousCursors.push(currentCursor);
+            currentCursor = nextCursor;
             currentOffset += PAGE_SIZE;
             fetchAndRender();
         });